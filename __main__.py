@@ -2,6 +2,7 @@ import argparse
 import bisect
 import os
 import random
+import re
 import sys
 import urllib.parse
 import uuid
@@ -42,6 +43,7 @@ def init_args():
         type=str, nargs='+', action='extend')
     arg('--mappings',
         type=str, metavar='<mappings file>')
+    arg('--audios-prefetch', type=int)
 
     arg('--loop')
     arg('--loop-time', type=float, default=3600)
@@ -57,6 +59,11 @@ def init_args():
     arg('--save')
 
     arg('--stream')
+    arg('--stream-live')
+    arg('--stream-lookahead',
+        type=float, default=5)
+    arg('--stream-live-timeout',
+        type=float, default=10)
     arg('--youtube-stream-key', type=str)
     arg('--instagram-username', type=str)
     arg('--instagram-password', type=str)
@@ -73,6 +80,8 @@ def init_args():
     arg('--output-id', type=str)
 
     arg('--mappings-reinit')
+    arg('--mappings-flush',
+        type=float, default=5)
 
     arg('--mappings-audios', type=str,
         nargs='+', action='extend', default=[])
@@ -109,6 +118,7 @@ def init_args():
     arg('--mappings-max-interval', type=float)
     arg('--mappings-joints', type=int)
     arg('--mappings-splits', type=int)
+    arg('--mappings-jobs', type=int)
 
     arg('--mappings-videos', type=str,
         nargs='+', action='extend', default=[])
@@ -118,11 +128,25 @@ def init_args():
     arg('--videos-width', type=int)
     arg('--videos-height', type=int)
     arg('--videos-number', type=int)
+    arg('--videos-jobs',
+        type=int, default=8)
+    arg('--videos-refresh',
+        type=float, default=300)
 
     arg('--visual-filter-threads', type=int)
     arg('--visual-filter-retries',
         type=int, default=100)
     arg('--visual-filter-ordered')
+    arg('--visual-filter-adaptive')
+    arg('--visual-filter-speculate', type=int)
+    arg('--visual-filter-proxy')
+    arg('--visual-filter-proxy-height',
+        type=int, default=360)
+    arg('--visual-filter-proxy-rate', type=float)
+    arg('--visual-filter-step',
+        type=float, default=1.0)
+    arg('--visual-filter-batch',
+        type=int, default=16)
     arg('--visual-filter-chrono')
     arg('--visual-filter-chrono-speed',
         type=float, default=1.0)
@@ -142,8 +166,20 @@ def init_args():
         choices=['exclude', 'include'])
     arg('--visual-filter-face', type=str,
         choices=['exclude', 'include'])
+    arg('--visual-filter-face-jobs', type=int,
+        default=os.cpu_count())
+    arg('--visual-filter-face-width',
+        type=int, default=640)
+    arg('--visual-filter-face-upsample',
+        type=int, default=1)
     arg('--visual-filter-word', type=str,
         choices=['exclude', 'include'])
+    arg('--visual-filter-word-jobs', type=int,
+        default=os.cpu_count())
+    arg('--visual-filter-word-density',
+        type=float, default=0.04)
+    arg('--visual-filter-word-timeout',
+        type=float, default=2)
 
     arg('--visual-effect-speedup')
     arg('--visual-effect-speedup-freq',
@@ -155,6 +191,14 @@ def init_args():
         type=float, default=-0.030)
     arg('--increment-offset',
         type=float, default=-0.014)
+    arg('--increment-jobs', type=int)
+    arg('--increment-gap',
+        type=float, default=10)
+    arg('--increment-batch',
+        type=int, default=32)
+    arg('--keyframes')
+    arg('--keyframes-window',
+        type=float, default=2)
     arg('--mixed-offset',
         type=float, default=-0.045)
 
@@ -172,6 +216,32 @@ def init_args():
     arg('--threads', type=int,
         default=os.cpu_count())
 
+    arg('--cache-dir', type=str,
+        default=os.path.join(
+            os.path.expanduser('~'),
+            '.cache', 'beauty'
+        ))
+    arg('--cache-size', type=float, default=1024)
+    arg('--media-cache-dir', type=str,
+        default=os.path.join(
+            os.path.expanduser('~'),
+            '.cache', 'beauty-media'
+        ))
+    arg('--media-cache-size',
+        type=float, default=8192)
+    arg('--media-cache-uses',
+        type=int, default=3)
+    arg('--media-cache-jobs',
+        type=int, default=2)
+    arg('--no-cache')
+    arg('--probe-ttl', type=float, default=3600)
+    arg('--index-jobs', type=int,
+        default=os.cpu_count())
+    arg('--index-chunk',
+        type=float, default=300)
+    arg('--index-overlap',
+        type=float, default=1)
+
     arg('--loglevel', type=str, default='warning',
         choices=['quiet', 'warning', 'verbose'])
 
@@ -218,6 +288,10 @@ def init_args():
                 )
                 live.start_broadcast()
 
+    if args.stream_live:
+        args.stream = True
+        args.increment = True
+        args.reencode = False
     if not args.output_format:
         args.output_format = 'flv' \
             if args.stream or args.play \
@@ -238,7 +312,8 @@ def init_args():
                 else None
     args.audio_output = \
         args.audio_output.format(
-            args.media_output, 'm4a'
+            args.media_output,
+            'mka' if args.stream_live else 'm4a'
             ) if args.audios else None
     args.videos = \
         args.videos or ['flowers'] \
@@ -259,12 +334,12 @@ def init_args():
             args.media_output + '.txt'
     args.mappings_audios = \
         args.mappings_audios or [
-            f'{audio}.txt'
+            mappings_file(audio)
                 for audio in args.audios
         ]
     args.mappings_videos = \
         args.mappings_videos or [
-            f'{video}.txt'
+            mappings_file(video)
                 for video in args.videos
         ]
     args.media_output += \
@@ -321,17 +396,37 @@ def init_args():
                 last_url = arg
 
     if args.mappings_from_cuts:
+        from beauty.mappings \
+            import read, write
+        from beauty.videos \
+            import mappings_from_cuts
+        import multiprocessing.pool
+        pending = [
+            (url, file) for url, file in zip(
+                args.videos, args.mappings_videos
+            ) if not read(file)
+        ]
+        if pending:
+            pool = \
+                multiprocessing.pool.ThreadPool(
+                    min(
+                        len(pending),
+                        args.videos_jobs
+                    )
+                )
+            for (_, file), mappings in zip(
+                pending,
+                pool.map(
+                    mappings_from_cuts,
+                    [url for url, _ in pending]
+                )
+            ):
+                write(file, mappings)
+            pool.close()
         for url, file in zip(
             args.videos, args.mappings_videos
         ):
-            from beauty.mappings \
-                import read, write
             mappings = read(file)
-            if not mappings:
-                from beauty.videos \
-                    import mappings_from_cuts
-                mappings = mappings_from_cuts(url)
-                write(file, mappings)
             if url not in args.inputs:
                 args.inputs[url] = [
                     (
@@ -368,6 +463,17 @@ def init_args():
                         else bisect_points(final)
                 ]
 
+def mappings_file(source):
+    url = urllib.parse.urlparse(source)
+    if url.scheme and url.netloc:
+        source = re.sub(
+            r'[^\w.-]+', '_',
+            url.netloc + url.path +
+                ('?' + url.query
+                    if url.query else '')
+        ).strip('_')
+    return f'{source}.txt'
+
 def generate():
     from beauty import args
     import beauty.audios as audios
@@ -378,6 +484,20 @@ def generate():
 
     random.seed(int.from_bytes(os.urandom(4)))
 
+    if args.stream_live and \
+        args.audios and args.videos:
+        args.audios[:] = audios.read()
+        args.videos[:] = videos.read()
+        coders.write_video_live(
+            videos.generate_mappings_live(
+                audios.generate_mappings_live()
+            )
+        )
+        mappings.write(
+            args.mappings, videos.mappings
+        )
+        return
+
     if args.mappings_reinit:
         _mappings = []
     else:
@@ -1,12 +1,20 @@
+import bisect
 import collections
+import glob
+import importlib
 import itertools
+import multiprocessing
+import multiprocessing.pool
+import os
 import random
 import shutil
 import subprocess
 import tempfile
+import threading
+import typing
 import validators
 
-from . import args
+from . import args, caches, cuts, probes, processes
 from .mappings import Mapping, Resource
 from .youtube import (
     youtube_libraries,
@@ -14,14 +22,102 @@ from .youtube import (
     youtube_video
 )
 
+class Buffer(typing.NamedTuple):
+    samples: typing.Any
+    samplerate: int
+
+class AudioSource:
+    def __init__(self, samplerate, blocks, hop_size=512):
+        import numpy
+        self.samplerate = samplerate
+        self.blocks = iter(blocks)
+        self.hop_size = hop_size
+        self.samples = numpy.zeros(0, numpy.float32)
+        self.position = 0
+
+    def __call__(self):
+        import numpy
+        while (len(self.samples) - self.position
+            < self.hop_size):
+            block = next(self.blocks, None)
+            if block is None:
+                break
+            self.samples = \
+                numpy.concatenate((
+                    self.samples[self.position:],
+                    block
+                ))
+            self.position = 0
+        samples = \
+            self.samples[
+                self.position:
+                    self.position + self.hop_size
+            ]
+        read = len(samples)
+        self.position += read
+        if read < self.hop_size:
+            samples = \
+                numpy.pad(
+                    samples,
+                    (0, self.hop_size - read)
+                )
+        return samples, read
+
+buffers = {}
+analyses = {}
+activations = {}
+processors = {}
+memories = []
+
+activation_processors = {
+    'beats': (
+        'madmom.features.beats',
+        'RNNBeatProcessor'
+    ),
+    'chroma': (
+        'madmom.audio.chroma',
+        'DeepChromaProcessor'
+    ),
+    'chords': (
+        'madmom.features.chords',
+        'CNNChordFeatureProcessor'
+    ),
+    'notes-rnn': (
+        'madmom.features.notes',
+        'RNNPianoNoteProcessor'
+    ),
+    'notes-cnn': (
+        'madmom.features.notes',
+        'CNNPianoNoteProcessor'
+    )
+}
+
 def read():
     youtube_libraries(args.audios, 'audio')
     youtube_playlists(args.audios)
     if not args.audios:
         return []
+    if args.audios_prefetch and \
+        args.audios_prefetch > 1 and \
+            not args.stream_live:
+        return read_prefetch()
     while True:
         audio = \
             random.sample(args.audios, 1)[0]
+        if args.stream_live:
+            args.audio_input = audio
+            if 'youtu.be' in audio or \
+                'youtube.com' in audio:
+                video = \
+                    youtube_video(
+                        audio,
+                        filter='bestaudio',
+                        strict=False
+                    )
+                if not video:
+                    continue
+                args.audio_input = video[0]
+            break
         if not validators.url(audio):
             shutil.copyfile(
                 audio, args.audio_output
@@ -51,9 +147,92 @@ def read():
                 break
     return [audio]
 
-def fetch_audio(url, file):
+def read_prefetch():
+    candidates = \
+        random.sample(args.audios, len(args.audios))
+    cancel = threading.Event()
+    pool = \
+        multiprocessing.pool.ThreadPool(
+            args.audios_prefetch
+        )
+    result = collections.deque()
+    index = 0
     try:
-        subprocess.run([
+        while True:
+            while len(result) < \
+                args.audios_prefetch and \
+                    index < len(candidates):
+                result.append((
+                    candidates[index],
+                    pool.apply_async(
+                        prefetch_audio, (
+                            candidates[index],
+                            prefetch_file(index),
+                            cancel
+                        )
+                    )
+                ))
+                index += 1
+            if not result:
+                raise Exception(
+                    'No audio files or URLs '
+                    'can be read.'
+                )
+            audio, output = result.popleft()
+            output = output.get()
+            if output:
+                break
+    finally:
+        cancel.set()
+        pool.close()
+        pool.join()
+    if not validators.url(audio):
+        shutil.copyfile(audio, args.audio_output)
+    elif args.mappings_reinit:
+        shutil.move(output, args.audio_output)
+        shape_audio(
+            args.audio_output,
+            args.output_length
+        )
+    else:
+        args.audio_output = output
+    for i in range(index):
+        for file in glob.glob(
+            glob.escape(prefetch_file(i)) + '*'
+        ):
+            os.remove(file)
+    return [audio]
+
+def prefetch_audio(audio, file, cancel):
+    if not validators.url(audio):
+        return audio
+    if args.mappings_reinit:
+        return file \
+            if fetch_audio(audio, file, cancel) \
+                else None
+    if 'youtu.be' in audio or \
+        'youtube.com' in audio:
+        processes.local.cancel = cancel
+        try:
+            video = \
+                youtube_video(
+                    audio,
+                    filter='bestaudio[ext=m4a]',
+                    strict=False
+                )
+        finally:
+            processes.local.cancel = None
+        return video[0] if video else None
+    return None
+
+def prefetch_file(index):
+    root, ext = \
+        os.path.splitext(args.audio_output)
+    return f'{root}.{index}{ext}'
+
+def fetch_audio(url, file, cancel=None):
+    try:
+        proc = processes.run([
             *args.yt_dlp,
             '--quiet',
             '--no-warnings',
@@ -63,10 +242,11 @@ def fetch_audio(url, file):
             url,
             '-o', file
             ],
+            cancel=cancel,
             check=True,
             stderr=subprocess.PIPE
         )
-        return True
+        return proc is not None
     except subprocess.CalledProcessError as e:
         if any(
             message in e.stderr.decode()
@@ -80,19 +260,16 @@ def fetch_audio(url, file):
             raise e
 
 def shape_audio(file, length=None):
-    import pydub
-    audio = \
-        pydub.AudioSegment.from_file(file)
-    chunks = \
-        pydub.silence.detect_nonsilent(
-            audio,
+    chunks, total = \
+        detect_nonsilent(
+            *audio_blocks(file),
             min_silence_len=500,
             silence_thresh=-50
         )
     assert chunks
     start = chunks[0][0] / 1000
     final = chunks[0][1] / 1000
-    total = len(audio) / 1000
+    total = total / 1000
     if length and length < final:
         final = length
     if start != 0 or final != total:
@@ -119,8 +296,261 @@ def shape_audio(file, length=None):
             check=True
         )
         shutil.move(temp_file.name, file)
+        trim_buffers(file, start, final)
+
+def detect_nonsilent(
+    samplerate,
+    blocks,
+    min_silence_len=1000,
+    silence_thresh=-16
+):
+    import numpy
+    threshold = 10 ** (silence_thresh / 10)
+    carry = numpy.zeros(0, numpy.float32)
+    energy = numpy.zeros(0)
+    count = numpy.zeros(0)
+    bins, frames = 0, 0
+    ranges = []
+    def windows(first):
+        if len(energy) < min_silence_len:
+            return
+        e = numpy.concatenate(
+            ([0], numpy.cumsum(energy))
+        )
+        n = numpy.concatenate(
+            ([0], numpy.cumsum(count))
+        )
+        silent = \
+            numpy.flatnonzero(
+                e[min_silence_len:] -
+                    e[:-min_silence_len] <=
+                threshold * (
+                    n[min_silence_len:] -
+                        n[:-min_silence_len]
+                )
+            ) + first
+        if not len(silent):
+            return
+        splits = \
+            numpy.flatnonzero(
+                numpy.diff(silent) >
+                    min_silence_len
+            ) + 1
+        for group in numpy.split(silent, splits):
+            if ranges and group[0] <= \
+                ranges[-1][1] + min_silence_len:
+                ranges[-1][1] = int(group[-1])
+            else:
+                ranges.append(
+                    [int(group[0]), int(group[-1])]
+                )
+    for block in blocks:
+        samples = numpy.concatenate((carry, block))
+        frames += len(block)
+        base = bins * samplerate // 1000
+        ends = \
+            numpy.arange(
+                bins + 1,
+                bins + 2 + len(samples) * 1000
+                    // samplerate
+            ) * samplerate // 1000 - base
+        ends = ends[ends <= len(samples)]
+        if not len(ends):
+            carry = samples
+            continue
+        squares = \
+            numpy.concatenate((
+                [0],
+                numpy.cumsum(
+                    numpy.square(
+                        samples,
+                        dtype=numpy.float64
+                    )
+                )
+            ))
+        starts = numpy.concatenate(([0], ends[:-1]))
+        carry = samples[ends[-1]:]
+        first = bins - len(energy)
+        energy = numpy.concatenate((
+            energy, squares[ends] - squares[starts]
+        ))
+        count = numpy.concatenate((
+            count, ends - starts
+        ))
+        bins += len(ends)
+        windows(first)
+        energy = energy[len(energy) -
+            min(len(energy), min_silence_len - 1):]
+        count = count[len(count) -
+            min(len(count), min_silence_len - 1):]
+    if len(carry):
+        first = bins - len(energy)
+        energy = numpy.append(
+            energy,
+            numpy.square(
+                carry, dtype=numpy.float64
+            ).sum()
+        )
+        count = numpy.append(count, len(carry))
+        bins += 1
+        windows(first)
+    total = round(frames * 1000 / samplerate)
+    silent = [
+        [start, min(final + min_silence_len, total)]
+            for start, final in ranges
+    ]
+    if not silent:
+        return [[0, total]], total
+    if silent[0] == [0, total]:
+        return [], total
+    nonsilent = []
+    prev = 0
+    for start, final in silent:
+        nonsilent.append([prev, start])
+        prev = final
+    if final != total:
+        nonsilent.append([prev, total])
+    if nonsilent[0] == [0, 0]:
+        nonsilent.pop(0)
+    return nonsilent, total
 
 def generate_mappings():
+    init_detectors()
+    points = \
+        cuts.pipeline(
+            [
+                0,
+                *detect_points(args.audio_output),
+                duration(args.audio_output)
+            ],
+            length=args.output_length,
+            joints=args.mappings_joints,
+            splits=args.mappings_splits,
+            max_interval=args.mappings_max_interval,
+            min_interval=args.mappings_min_interval
+        )
+    return [
+        Mapping(
+            target=Resource(
+                start=points[i],
+                final=points[i + 1]
+            )
+        ) for i in range(len(points) - 1)
+    ]
+
+def generate_mappings_live():
+    init_detectors()
+    source = AudioSource(*live_blocks())
+    start, final = 0, None
+    for name, point in live_points(source):
+        if name == 'end':
+            if final is not None and \
+                point - final >= (
+                    args.mappings_min_interval or 0
+                ):
+                yield from \
+                    live_mappings(start, final)
+                start = final
+            if point > start:
+                yield from \
+                    live_mappings(start, point)
+            return
+        if final is not None:
+            yield from live_mappings(start, final)
+            start = final
+        final = point
+
+def live_points(source):
+    pending = []
+    last, previous, index = 0, 0, 0
+    for name, point in aubio_events(
+        source, aubio_detectors() or {'beats'}
+    ):
+        if name != 'end':
+            bisect.insort(pending, point)
+        while pending and (
+            name == 'end' or pending[0] < point - 1
+        ):
+            p = pending.pop(0)
+            if p <= previous or (
+                args.output_length and
+                    p >= args.output_length
+            ):
+                continue
+            previous = p
+            index += 1
+            if args.mappings_joints and \
+                args.mappings_joints > 1 and \
+                    index % args.mappings_joints:
+                continue
+            if p - last < (
+                args.mappings_min_interval or 0
+            ):
+                continue
+            last = p
+            yield 'point', p
+        if name == 'end':
+            yield name, min(
+                point, args.output_length
+            ) if args.output_length else point
+
+def live_mappings(start, final):
+    points = cuts.unique([start, final])
+    if args.mappings_splits and \
+        args.mappings_splits > 1:
+        points = \
+            cuts.split(points, args.mappings_splits)
+    if args.mappings_max_interval:
+        points = \
+            cuts.unique([
+                *cuts.stretch(
+                    points,
+                    args.mappings_max_interval
+                ),
+                final
+            ])
+    points = points.tolist()
+    return [
+        Mapping(
+            target=Resource(
+                start=points[i],
+                final=points[i + 1]
+            )
+        ) for i in range(len(points) - 1)
+    ]
+
+def live_blocks(samplerate=44100, size=1 << 12):
+    source = args.audio_input
+    return samplerate, pipe_audio([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        *(
+            (
+                '-follow', '1',
+                '-rw_timeout', str(int(
+                    args.stream_live_timeout * 1e6
+                ))
+            ) if os.path.isfile(source) else ()
+        ),
+        '-i',
+            'pipe:0' if source == '-' else source,
+        '-map', '0:a:0',
+        '-ac', '1',
+        '-ar', str(samplerate),
+        '-f', 'f32le',
+        'pipe:1',
+        '-map', '0:a:0',
+        '-codec:a', 'copy',
+        '-live', '1',
+        '-flush_packets', '1',
+        '-f', 'matroska',
+        '-y',
+        args.audio_output
+        ],
+        size
+    )
+
+def init_detectors():
     if (args.mappings_from_chords_chroma or
         args.mappings_from_chords_cnn):
         args.mappings_from_chords = True
@@ -138,78 +568,158 @@ def generate_mappings():
        not args.mappings_from_onsets):
         args.mappings_from_chords = True
         args.mappings_from_beats = True
-    points = sorted(set([
-        0,
-        *(points_from_chords(args.audio_output)
-            if args.mappings_from_chords else []),
-        *(points_from_beats(args.audio_output)
-            if args.mappings_from_beats else []),
-        *(points_from_notes(args.audio_output)
-            if args.mappings_from_notes else []),
-        *(points_from_onsets(args.audio_output)
-            if args.mappings_from_onsets else []),
-        duration(args.audio_output)
-    ]))
-    if args.output_length:
-        points[:] = [
-            p for p in points
-                if p < args.output_length
-            ] + [args.output_length]
-    if args.mappings_joints and \
-        args.mappings_joints > 1:
-        points[:] = \
-            points[
-                :-1:args.mappings_joints
-                ] + [points[-1]]
-    if args.mappings_splits and \
-        args.mappings_splits > 1:
-        points[:] = [
-            points[i] +
-                (points[i + 1] - points[i]) *
-                    j / args.mappings_splits
-            for i in range(len(points) - 1)
-            for j in range(args.mappings_splits)
-            ] + [points[-1]]
-    if args.mappings_max_interval:
-        points[:] = [
-            points[i] +
-                j * args.mappings_max_interval
-            for i in range(len(points) - 1)
-            for j in range(
-                int(
-                    (points[i + 1]- points[i]) /
-                    args.mappings_max_interval + 1
-                )
-            )
-        ]
-    if args.mappings_min_interval:
-        p = [points[0]]
-        points[1:-1] = [
-            points[i]
-            for i in range(1, len(points) - 1)
-                if points[i] - p[0] >=
-                    args.mappings_min_interval
-                    and points[-1] - points[i] >=
-                        args.mappings_min_interval
-                    and not p.remove(p[0])
-                    and not p.append(points[i])
+    if (args.mappings_from_chords and
+        not args.mappings_from_chords_chroma and
+        not args.mappings_from_chords_cnn):
+        args.mappings_from_chords_chroma = True
+    if ('beats' in aubio_detectors() and
+        not args.mappings_joints):
+        args.mappings_joints = 8
+
+def detect_points(file):
+    groups = detector_groups()
+    jobs = min(
+        args.mappings_jobs or 1, len(groups)
+    )
+    if jobs < 2:
+        return [
+            p for funcs in groups
+                for p in detect_group(funcs, file)
         ]
+    audio_buffer(file, 44100)
+    shares = share_buffers(file)
+    context = \
+        multiprocessing.get_context('forkserver')
+    try:
+        with context.Pool(
+            jobs, processes.init, (args,)
+            ) as pool:
+            result = \
+                pool.starmap(
+                    detect_group,
+                    [
+                        (funcs, file, shares)
+                            for funcs in groups
+                    ]
+                )
+    finally:
+        while memories:
+            memory = memories.pop()
+            memory.close()
+            memory.unlink()
+    return list(
+        itertools.chain.from_iterable(result)
+    )
+
+def detector_groups():
+    aubio = aubio_detectors()
+    groups = []
+    shared = []
+    for func, name, enabled in (
+        (
+            points_from_chords,
+            'chords',
+            args.mappings_from_chords
+        ), (
+            points_from_beats,
+            'beats',
+            args.mappings_from_beats
+        ), (
+            points_from_notes,
+            'notes',
+            args.mappings_from_notes
+        ), (
+            points_from_onsets,
+            'onsets',
+            args.mappings_from_onsets
+        )
+    ):
+        if not enabled:
+            continue
+        if name in aubio:
+            shared.append(func)
+        else:
+            groups.append([func])
+    if shared:
+        groups.append(shared)
+    return groups
+
+def detect_group(funcs, file, shares=()):
+    attach_buffers(shares)
     return [
-        Mapping(
-            target=Resource(
-                start=points[i],
-                final=points[i + 1]
-            )
-        ) for i in range(len(points) - 1)
+        p for func in funcs
+            for p in points_cached(func, file)
     ]
 
+def share_buffers(file):
+    import numpy
+    from multiprocessing import shared_memory
+    shares = []
+    for key, buffer in list(buffers.items()):
+        if key[0] != file or \
+            not buffer.samples.nbytes:
+            continue
+        memory = \
+            shared_memory.SharedMemory(
+                create=True,
+                size=buffer.samples.nbytes
+            )
+        numpy.ndarray(
+            buffer.samples.shape,
+            dtype=buffer.samples.dtype,
+            buffer=memory.buf
+        )[:] = buffer.samples
+        memories.append(memory)
+        shares.append((
+            key,
+            memory.name,
+            buffer.samples.shape,
+            buffer.samples.dtype.str,
+            buffer.samplerate
+        ))
+    return shares
+
+def attach_buffers(shares):
+    import numpy
+    from multiprocessing import shared_memory
+    for key, name, shape, dtype, samplerate \
+        in shares:
+        if key in buffers:
+            continue
+        memory = \
+            shared_memory.SharedMemory(name=name)
+        memories.append(memory)
+        buffers[key] = \
+            Buffer(
+                samples=numpy.ndarray(
+                    shape,
+                    dtype=dtype,
+                    buffer=memory.buf
+                ),
+                samplerate=samplerate
+            )
+
+def points_cached(func, file=None):
+    file = file or args.audio_output
+    return caches.cached(
+        'points', (
+            func.__name__,
+            audio_hash(file),
+            sorted(
+                (name, value) for name, value
+                    in vars(args).items()
+                        if name.startswith(
+                            'mappings_from_'
+                        )
+            )
+        ),
+        lambda: func(file)
+    )
+
 def points_from_chords(file):
-    from madmom.audio.chroma \
-        import DeepChromaProcessor
     from madmom.features.chords import (
         DeepChromaChordRecognitionProcessor,
-        CRFChordRecognitionProcessor,
-        CNNChordFeatureProcessor
+        CRFChordRecognitionProcessor
     )
     if (not args.mappings_from_chords_chroma
         and not args.mappings_from_chords_cnn):
@@ -218,16 +728,16 @@ def points_from_chords(file):
     feat = []
     if args.mappings_from_chords_chroma:
         proc.append(
-            DeepChromaChordRecognitionProcessor()
+            processor(
+                DeepChromaChordRecognitionProcessor
+            )
         )
-        feat.append(DeepChromaProcessor()(file))
+        feat.append(activation(file, 'chroma'))
     if args.mappings_from_chords_cnn:
         proc.append(
-            CRFChordRecognitionProcessor()
-        )
-        feat.append(
-            CNNChordFeatureProcessor()(file)
+            processor(CRFChordRecognitionProcessor)
         )
+        feat.append(activation(file, 'chords'))
     return set(
         itertools.chain.from_iterable(
             (e for (_, e, _) in p(f))
@@ -240,27 +750,26 @@ def points_from_beats(file):
         BeatDetectionProcessor,
         CRFBeatDetectionProcessor,
         BeatTrackingProcessor,
-        DBNBeatTrackingProcessor,
-        RNNBeatProcessor
+        DBNBeatTrackingProcessor
     )
     if (not args.mappings_from_beats_detection and
         not args.mappings_from_beats_detection_crf
         and
         not args.mappings_from_beats_tracking and
         not args.mappings_from_beats_tracking_dbn):
-        if not args.mappings_joints:
-            args.mappings_joints = 8
         return points_from_beats_aubio(file)
     proc = []
     if args.mappings_from_beats_detection:
         proc.append(
-            BeatDetectionProcessor(
+            processor(
+                BeatDetectionProcessor,
                 fps=100
             )
         )
     if args.mappings_from_beats_detection_crf:
         proc.append(
-            CRFBeatDetectionProcessor(
+            processor(
+                CRFBeatDetectionProcessor,
                 min_bpm=50,
                 max_bpm=100,
                 fps=100
@@ -268,45 +777,29 @@ def points_from_beats(file):
         )
     if args.mappings_from_beats_tracking:
         proc.append(
-            BeatTrackingProcessor(
+            processor(
+                BeatTrackingProcessor,
                 fps=100
             )
         )
     if args.mappings_from_beats_tracking_dbn:
         proc.append(
-            DBNBeatTrackingProcessor(
+            processor(
+                DBNBeatTrackingProcessor,
                 min_bpm=50,
                 max_bpm=100,
                 fps=100
             )
         )
+    act = activation(file, 'beats')
     return set(
         itertools.chain.from_iterable(
-            p(RNNBeatProcessor()(file))
-                for p in proc
+            p(act) for p in proc
         )
     )
 
 def points_from_beats_aubio(file):
-    import aubio
-    source = aubio_source(file)
-    win_s, hop_s, rate = 1024, 512, 0
-    tempi = \
-        aubio.tempo(
-            "specdiff",
-            win_s,
-            hop_s,
-            rate
-        )
-    beats = []
-    while True:
-        samples, read = source()
-        is_beat = tempi(samples)
-        if is_beat:
-            beats.append(tempi.get_last_s())
-        if read < hop_s:
-            break
-    return beats
+    return aubio_points(file, 'beats')
 
 def points_from_notes(file):
     if (not args.mappings_from_notes_rnn and
@@ -316,23 +809,24 @@ def points_from_notes(file):
     act = []
     if args.mappings_from_notes_rnn:
         from madmom.features.notes import (
-            NotePeakPickingProcessor,
-            RNNPianoNoteProcessor,
+            NotePeakPickingProcessor
         )
         proc.append(
-            NotePeakPickingProcessor(
+            processor(
+                NotePeakPickingProcessor,
                 fps=100,
                 pitch_offset=21
             )
         )
-        act.append(RNNPianoNoteProcessor()(file))
+        act.append(activation(file, 'notes-rnn'))
     if args.mappings_from_notes_cnn:
         from madmom.features.notes import (
-            ADSRNoteTrackingProcessor,
-            CNNPianoNoteProcessor
+            ADSRNoteTrackingProcessor
         )
-        proc.append(ADSRNoteTrackingProcessor())
-        act.append(CNNPianoNoteProcessor()(file))
+        proc.append(
+            processor(ADSRNoteTrackingProcessor)
+        )
+        act.append(activation(file, 'notes-cnn'))
     return set(
         itertools.chain.from_iterable(
             (t for (t, *_) in p(a))
@@ -341,89 +835,133 @@ def points_from_notes(file):
     )
 
 def points_from_notes_aubio(file):
-    import aubio
-    source = aubio_source(file)
-    notes = aubio.notes(
-        samplerate=source.samplerate
-    )
-    notes.set_minioi_ms(
-        args.mappings_from_notes_min_length
-            * 1000
-    )
-    notes.set_silence(
-        args.mappings_from_notes_min_volume
-    )
-    points = []
-    frames = 0
-    while True:
-        samples, read = source()
-        if notes(samples)[0] != 0:
-            points.append(
-                frames / source.samplerate
-            )
-        frames += read
-        if read < source.hop_size:
-            break
-    return set(points)
+    return aubio_points(file, 'notes')
 
 def points_from_onsets(file):
+    return aubio_points(file, 'onsets')
+
+def aubio_detectors():
+    names = set()
+    if (args.mappings_from_beats and
+        not args.mappings_from_beats_detection and
+        not args.mappings_from_beats_detection_crf
+        and
+        not args.mappings_from_beats_tracking and
+        not args.mappings_from_beats_tracking_dbn):
+        names.add('beats')
+    if (args.mappings_from_notes and
+        not args.mappings_from_notes_rnn and
+        not args.mappings_from_notes_cnn):
+        names.add('notes')
+    if args.mappings_from_onsets:
+        names.add('onsets')
+    return names
+
+def aubio_points(file, name):
+    if name not in analyses.get(file, {}):
+        analyses.setdefault(file, {}).update(
+            analyse_aubio(
+                file,
+                {name, *aubio_detectors()} -
+                    set(analyses.get(file, {}))
+            )
+        )
+    return analyses[file][name]
+
+def analyse_aubio(file, names):
+    points = {name: [] for name in names}
+    for name, point in aubio_events(
+        aubio_source(file), names
+    ):
+        if name in points:
+            points[name].append(point)
+    return {
+        name: points[name]
+            if name == 'beats'
+                else set(points[name])
+        for name in names
+    }
+
+def aubio_events(source, names):
     import aubio
-    source = aubio_source(file)
-    onset = \
-        aubio.onset(
-            args.mappings_from_onsets_method,
-            samplerate=source.samplerate
-        )
-    onset.set_threshold(
-        args.mappings_from_onsets_threshold
-    )
-    onset.set_minioi_ms(
-        args.mappings_from_onsets_min_length
-            * 1000
-    )
-    onset.set_silence(
-        args.mappings_from_onsets_min_volume
-    )
-    points = []
+    tempi, notes, onset = None, None, None
+    if 'beats' in names:
+        tempi = \
+            aubio.tempo(
+                'specdiff',
+                2 * source.hop_size,
+                source.hop_size,
+                source.samplerate
+            )
+    if 'notes' in names:
+        notes = \
+            aubio.notes(
+                samplerate=source.samplerate
+            )
+        notes.set_minioi_ms(
+            args.mappings_from_notes_min_length
+                * 1000
+        )
+        notes.set_silence(
+            args.mappings_from_notes_min_volume
+        )
+    if 'onsets' in names:
+        onset = \
+            aubio.onset(
+                args.mappings_from_onsets_method,
+                samplerate=source.samplerate
+            )
+        onset.set_threshold(
+            args.mappings_from_onsets_threshold
+        )
+        onset.set_minioi_ms(
+            args.mappings_from_onsets_min_length
+                * 1000
+        )
+        onset.set_silence(
+            args.mappings_from_onsets_min_volume
+        )
+    frames = 0
     while True:
         samples, read = source()
-        if onset(samples):
-            points.append(
-                onset.get_last() /
-                    source.samplerate
-            )
+        if tempi and tempi(samples):
+            yield 'beats', tempi.get_last_s()
+        if notes and notes(samples)[0] != 0:
+            yield 'notes', frames / source.samplerate
+        if onset and onset(samples):
+            yield 'onsets', \
+                onset.get_last() / source.samplerate
+        frames += read
         if read < source.hop_size:
             break
-    return set(points)
+    yield 'end', frames / source.samplerate
 
-def property(url, stream, name):
-    proc = subprocess.run([
-        *args.ffprobe,
-        '-select_streams', stream,
-        '-show_entries', f'format={name}',
-        '-of',
-        'default=noprint_wrappers=1:nokey=1',
-        '-v', 'quiet',
-        url
-        ],
-        check=True,
-        stdout=subprocess.PIPE
+def property(url, stream, name, section='format'):
+    return float(
+        probes.property(url, stream, name, section)
     )
-    return float(proc.stdout.decode())
 
 def duration(url):
     return property(url, 'a:0', 'duration')
 
 def tempo(file):
-    return tempo_from_beats_madmom(file)
+    return caches.cached(
+        'tempo', (
+            tempo_from_beats_madmom.__name__,
+            audio_hash(file)
+        ),
+        lambda: tempo_from_beats_madmom(file)
+    )
 
 def tempo_from_beats_madmom(file):
     from madmom.features.tempo \
         import TempoEstimationProcessor
-    from madmom.features.beats \
-        import RNNBeatProcessor
-    proc = TempoEstimationProcessor(fps=100)
-    act = RNNBeatProcessor()(file)
+    proc = \
+        processor(
+            TempoEstimationProcessor,
+            fps=100
+        )
+    act = activation(file, 'beats')
     return proc(act)[0][0]
 
 def tempo_from_beats_aubio(file):
@@ -436,10 +974,11 @@ def tempo_from_chords(file):
     from madmom.features.chords import (
         DeepChromaChordRecognitionProcessor
     )
-    from madmom.audio.chroma \
-        import DeepChromaProcessor
-    proc = DeepChromaChordRecognitionProcessor()
-    feat = DeepChromaProcessor()(file)
+    proc = \
+        processor(
+            DeepChromaChordRecognitionProcessor
+        )
+    feat = activation(file, 'chroma')
     intervals = [
         (e - s - (e - s) % 0.01)
             for (s, e, _) in proc(feat)
@@ -450,14 +989,184 @@ def tempo_from_chords(file):
     )
 
 def aubio_source(file):
-    import aubio, pydub
-    audio = pydub.AudioSegment.from_file(file)
-    temp_file = \
-        tempfile.NamedTemporaryFile(
-            suffix='.wav'
-        )
-    audio.export(temp_file.name, format='wav')
-    samplerate, hop_s = 0, 512
-    return aubio.source(
-        temp_file.name, samplerate, hop_s
+    return AudioSource(*audio_blocks(file))
+
+def audio_blocks(file, samplerate=None, size=1 << 16):
+    if (file, None) not in buffers:
+        return (
+            samplerate or sample_rate(file),
+            stream_audio(file, samplerate, size)
+        )
+    samples, samplerate = \
+        audio_buffer(file, samplerate)
+    return samplerate, (
+        samples[i:i + size]
+            for i in range(0, len(samples), size)
+    )
+
+def stream_audio(file, samplerate=None, size=1 << 16):
+    return pipe_audio([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        '-i', file,
+        '-map', '0:a:0',
+        '-ac', '1',
+        *(
+            ('-ar', str(samplerate))
+                if samplerate else ()
+        ),
+        '-f', 'f32le',
+        '-'
+        ],
+        size
+    )
+
+def pipe_audio(cmd, size):
+    import numpy
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE
+    )
+    try:
+        while True:
+            data = proc.stdout.read(size * 4)
+            if not data:
+                break
+            yield numpy.frombuffer(
+                data[:len(data) - len(data) % 4],
+                dtype=numpy.float32
+            )
+    except GeneratorExit:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, proc.args
+        )
+
+def sample_rate(file):
+    return int(
+        property(
+            file,
+            'a:0',
+            'sample_rate',
+            'stream'
+        )
+    )
+
+def activation(file, name):
+    key = (name, audio_hash(file))
+    if key not in activations:
+        activations[key] = \
+            caches.cached(
+                'activations',
+                key,
+                lambda: activation_processor(
+                    name)(audio_signal(file))
+            )
+    return activations[key]
+
+def activation_processor(name):
+    module, cls = \
+        activation_processors[name]
+    return processor(
+        getattr(
+            importlib.import_module(module),
+            cls
+        )
     )
+
+def processor(cls, **kwargs):
+    key = (cls, tuple(sorted(kwargs.items())))
+    if key not in processors:
+        processors[key] = cls(**kwargs)
+    return processors[key]
+
+def audio_hash(file):
+    if os.path.isfile(file):
+        return caches.file_hash(file)
+    return caches.data_hash(
+        audio_buffer(file).samples
+    )
+
+def audio_signal(file, samplerate=44100):
+    from madmom.audio.signal import Signal
+    buffer = audio_buffer(file, samplerate)
+    return Signal(
+        buffer.samples,
+        sample_rate=buffer.samplerate
+    )
+
+def audio_buffer(file, samplerate=None):
+    if (file, None) not in buffers:
+        buffers[file, None] = decode_audio(file)
+    buffer = buffers[file, None]
+    if (samplerate is None or
+        samplerate == buffer.samplerate):
+        return buffer
+    if (file, samplerate) not in buffers:
+        buffers[file, samplerate] = \
+            resample_audio(buffer, samplerate)
+    return buffers[file, samplerate]
+
+def decode_audio(file):
+    import numpy
+    samplerate = sample_rate(file)
+    proc = subprocess.run([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        '-i', file,
+        '-map', '0:a:0',
+        '-ac', '1',
+        '-f', 'f32le',
+        '-'
+        ],
+        check=True,
+        stdout=subprocess.PIPE
+    )
+    return Buffer(
+        samples=numpy.frombuffer(
+            proc.stdout,
+            dtype=numpy.float32
+        ),
+        samplerate=samplerate
+    )
+
+def resample_audio(buffer, samplerate):
+    import numpy
+    proc = subprocess.run([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        '-f', 'f32le',
+        '-ar', str(buffer.samplerate),
+        '-ac', '1',
+        '-i', '-',
+        '-ar', str(samplerate),
+        '-f', 'f32le',
+        '-'
+        ],
+        check=True,
+        input=buffer.samples.tobytes(),
+        stdout=subprocess.PIPE
+    )
+    return Buffer(
+        samples=numpy.frombuffer(
+            proc.stdout,
+            dtype=numpy.float32
+        ),
+        samplerate=samplerate
+    )
+
+def trim_buffers(file, start, final):
+    for key, buffer in list(buffers.items()):
+        if key[0] == file:
+            buffers[key] = \
+                buffer._replace(
+                    samples=buffer.samples[
+                        int(start * buffer.samplerate):
+                        int(final * buffer.samplerate)
+                    ]
+                )
@@ -0,0 +1,115 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+from . import args
+
+hashes = {}
+totals = {}
+lock = threading.Lock()
+missing = object()
+
+def file_hash(file):
+    stat = os.stat(file)
+    key = (file, stat.st_size, stat.st_mtime_ns)
+    if key not in hashes:
+        digest = hashlib.sha1()
+        with open(file, 'rb') as f:
+            for block in iter(
+                lambda: f.read(1 << 20), b''
+            ):
+                digest.update(block)
+        hashes[key] = digest.hexdigest()
+    return hashes[key]
+
+def data_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+def path(name, key):
+    return os.path.join(
+        args.cache_dir,
+        name,
+        hashlib.sha1(
+            repr(key).encode()
+            ).hexdigest() + '.pickle'
+    )
+
+def load(name, key, default=None):
+    if args.no_cache:
+        return default
+    file = path(name, key)
+    try:
+        with open(file, 'rb') as f:
+            value = pickle.load(f)
+    except (
+        OSError,
+        EOFError,
+        pickle.UnpicklingError
+    ):
+        return default
+    with contextlib.suppress(OSError):
+        os.utime(file)
+    return value
+
+def store(name, key, value):
+    if args.no_cache:
+        return value
+    file = path(name, key)
+    os.makedirs(
+        os.path.dirname(file), exist_ok=True
+    )
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(file),
+        delete=False
+        ) as f:
+        pickle.dump(value, f)
+    os.replace(f.name, file)
+    with lock:
+        total = totals.get(args.cache_dir)
+        if total is not None:
+            total += os.path.getsize(file)
+            totals[args.cache_dir] = total
+    if total is None or \
+        total > args.cache_size * 2**20:
+        evict()
+    return value
+
+def cached(name, key, func):
+    value = load(name, key, missing)
+    if value is missing:
+        value = store(name, key, func())
+    return value
+
+def evict(root=None, size=None, keep=()):
+    root = root or args.cache_dir
+    limit = (
+        args.cache_size
+            if size is None else size
+    ) * 2**20
+    with lock:
+        entries = []
+        for directory, _, files in \
+            os.walk(root):
+            for file in files:
+                file = os.path.join(directory, file)
+                if file in keep:
+                    continue
+                with contextlib.suppress(OSError):
+                    stat = os.stat(file)
+                    entries.append((
+                        stat.st_mtime,
+                        stat.st_size,
+                        file
+                    ))
+        total = sum(e[1] for e in entries)
+        if total > limit:
+            for _, _size, file in sorted(entries):
+                if total <= limit * 0.9:
+                    break
+                with contextlib.suppress(OSError):
+                    os.remove(file)
+                    total -= _size
+        totals[root] = total
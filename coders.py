@@ -10,7 +10,6 @@ import uuid
 import beauty.videos as videos
 from . import args
 from .effects import visual_effects
-from .videos import read_video
 
 def mappings_complete(mappings):
     return all(
@@ -46,7 +45,7 @@ def write_video_reencode(mappings):
     for mapping in mappings:
         if mapping.source.url \
             not in videos.videos:
-            read_video(mapping.source.url)
+            videos.read_video(mapping.source.url)
     def apply(functions, x):
         y = x
         for f in functions:
@@ -159,23 +158,7 @@ def write_video_reencode(mappings):
             if args.output_format != 'flv'
                 else 'aac',
         '-threads', str(args.threads),
-        '-f', 'tee',
-        '-use_fifo', '1',
-        '|'.join(
-            ('[f={}{}]'.format(
-                args.output_format,
-                ':flvflags=no_duration_filesize'
-                    if args.output_format == 'flv'
-                        else ''
-                ) if args.output_format else ''
-            ) + (target
-                if target != '-' else
-                    'pipe:1'
-            ) for target in (args.output
-                if args.output else
-                    [args.media_output]
-            )
-        ),
+        *output_tee(),
         '-y'
         ],
         check=True
@@ -328,6 +311,89 @@ def write_video_with_audio(mappings):
         '-codec:a', 'copy'
             if args.output_format != 'flv'
                 else 'aac',
+        *output_tee(),
+        '-y'
+        ],
+        check=True
+    )
+
+def write_video_live(mappings):
+    proc = None
+    ready = []
+    for index, mapping in enumerate(mappings):
+        ready.append((index, mapping))
+        if proc is None:
+            if mapping.target.final < \
+                args.stream_lookahead:
+                continue
+            proc = write_video_live_output()
+        for _index, _mapping in ready:
+            proc.stdin.write(
+                write_video_live_segment(
+                    _index, _mapping
+                )
+            )
+        proc.stdin.flush()
+        ready.clear()
+    if proc is None:
+        proc = write_video_live_output()
+    for _index, _mapping in ready:
+        proc.stdin.write(
+            write_video_live_segment(
+                _index, _mapping
+            )
+        )
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, proc.args
+        )
+
+def write_video_live_output():
+    return subprocess.Popen([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        '-re',
+        '-f', 'mpegts',
+        '-i', 'pipe:0',
+        '-re',
+        '-follow', '1',
+        '-rw_timeout', str(int(
+            args.stream_live_timeout * 1e6
+        )),
+        '-i', args.audio_output,
+        '-map', '0:v',
+        '-map', '1:a',
+        '-codec:v', 'copy',
+        '-codec:a', 'copy'
+            if args.output_format != 'flv'
+                else 'aac',
+        *output_tee(),
+        '-y'
+        ],
+        stdin=subprocess.PIPE
+    )
+
+def write_video_live_segment(index, mapping):
+    proc = subprocess.run([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        '-i', args.video_cache.format(index + 1),
+        '-map', '0:v',
+        '-codec:v', 'copy',
+        '-bsf:v', 'h264_mp4toannexb',
+        '-output_ts_offset',
+            '{:.3f}'.format(mapping.target.start),
+        '-f', 'mpegts',
+        'pipe:1'
+        ],
+        check=True,
+        stdout=subprocess.PIPE
+    )
+    return proc.stdout
+
+def output_tee():
+    return [
         '-f', 'tee',
         '-use_fifo', '1',
         '|'.join(
@@ -344,11 +410,8 @@ def write_video_with_audio(mappings):
                 if args.output else
                     [args.media_output]
             )
-        ),
-        '-y'
-        ],
-        check=True
-    )
+        )
+    ]
 
 def write_video_batch():
     argv = write_video_batch_args()
@@ -0,0 +1,90 @@
+def pipeline(
+    points,
+    length=None,
+    joints=None,
+    splits=None,
+    max_interval=None,
+    min_interval=None
+):
+    points = unique(points)
+    if length:
+        points = limit(points, length)
+    if joints and joints > 1:
+        points = joint(points, joints)
+    if splits and splits > 1:
+        points = split(points, splits)
+    if max_interval:
+        points = stretch(points, max_interval)
+    if min_interval:
+        points = squeeze(points, min_interval)
+    return points.tolist()
+
+def unique(points):
+    import numpy
+    return numpy.unique(
+        numpy.asarray(points, dtype=float)
+    )
+
+def limit(points, length):
+    import numpy
+    return numpy.append(
+        points[points < length], length
+    )
+
+def joint(points, joints):
+    import numpy
+    return numpy.append(
+        points[:-1:joints], points[-1]
+    )
+
+def split(points, splits):
+    import numpy
+    return numpy.append(
+        (
+            points[:-1, None] +
+                numpy.diff(points)[:, None] *
+                    numpy.arange(splits) / splits
+        ).ravel(),
+        points[-1]
+    )
+
+def stretch(points, max_interval):
+    import numpy
+    counts = (
+        numpy.diff(points) / max_interval + 1
+        ).astype(int)
+    steps = \
+        numpy.arange(counts.sum()) - \
+            numpy.repeat(
+                numpy.cumsum(counts) - counts,
+                counts
+            )
+    return numpy.repeat(points[:-1], counts) + \
+        steps * max_interval
+
+def squeeze(points, min_interval):
+    import numpy
+    if len(points) < 3:
+        return points
+    final = len(points) - 1
+    index = [0]
+    while True:
+        last = points[index[-1]]
+        i = index[-1] + 1
+        j = max(i, min(final, int(
+            numpy.searchsorted(
+                points, last + min_interval
+            )
+        )))
+        while j > i and \
+            points[j - 1] - last >= min_interval:
+            j -= 1
+        while j < final and \
+            points[j] - last < min_interval:
+            j += 1
+        if j >= final or \
+            points[final] - points[j] < min_interval:
+            break
+        index.append(j)
+    index.append(final)
+    return points[index]
@@ -0,0 +1,12 @@
+detectors = []
+
+def detect(image, upsample):
+    if not detectors:
+        import dlib
+        detectors.append(
+            dlib.get_frontal_face_detector()
+        )
+    return any(
+        len(detectors[0](image, times))
+            for times in range(upsample + 1)
+    )
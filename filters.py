@@ -1,21 +1,20 @@
+import itertools
+import multiprocessing
+import multiprocessing.pool
 import subprocess
 import sys
+import threading
+import time
 
-from . import args
-from .mappings import Mapping
+from . import args, faces, indexes, probes, processes
+from .mappings import Mapping, Resource
+
+pools = []
+stats = {}
+lock = threading.Lock()
 
 def visual_filter(mapping: Mapping, video):
-    filters = [
-        visual_filter_pace,
-        visual_filter_cuts,
-        visual_filter_dark,
-        visual_filter_face,
-        visual_filter_word
-    ]
-    filters = [
-        f for f in filters
-            if getattr(args, f.__name__)
-    ]
+    filters = visual_filters()
     if args.visual_filter_ordered:
         filters.sort(
             key=lambda f:
@@ -24,151 +23,322 @@ def visual_filter(mapping: Mapping, video):
                         .replace('_', '-')
                 )
         )
+    elif args.visual_filter_adaptive:
+        filters.sort(key=visual_filter_rank)
+    images = {}
     for f in filters:
-        if not f(mapping, video):
+        start = time.perf_counter()
+        accept = f(mapping, video, images)
+        with lock:
+            stat = stats.setdefault(
+                f.__name__, [0, 0, 0.0]
+            )
+            stat[0] += 1
+            stat[1] += not accept
+            stat[2] += \
+                time.perf_counter() - start
+        if not accept:
             return False
     return True
 
-def visual_filter_base(
-    mapping: Mapping,
-    video,
-    expr,
-    func
-):
-    proc = subprocess.run([
-        *args.ffmpeg,
-        '-ss', str(mapping.source.start),
-        '-to', str(mapping.source.final),
-        '-i', video,
-        '-vf', expr,
-        '-f', 'null',
-        '-'
-        ],
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+def visual_filters():
+    filters = [
+        visual_filter_pace,
+        visual_filter_cuts,
+        visual_filter_dark,
+        visual_filter_face,
+        visual_filter_word
+    ]
+    return [
+        f for f in filters
+            if getattr(args, f.__name__)
+    ]
+
+def visual_filter_rank(f):
+    calls, rejects, seconds = \
+        stats.get(f.__name__, (0, 0, 0.0))
+    if not calls:
+        return 0
+    return seconds / calls / (
+        (rejects + 1) / (calls + 2)
     )
-    return func(proc.stderr.decode())
 
-def visual_filter_pace(mapping: Mapping, video):
-    expr = \
-        'select=\'gt(scene,{})\',showinfo' \
-            .format(
-                args.visual_filter_pace_prob
+def visual_filter_report():
+    if not args.visual_filter_adaptive:
+        return
+    for name, (calls, rejects, seconds) in \
+        sorted(stats.items()):
+        sys.stderr.write(
+            '{}: {} calls, {:.1%} rejected, '
+            '{:.3f}s per call\n'.format(
+                name,
+                calls,
+                rejects / calls,
+                seconds / calls
             )
-    def func(x):
-        _frames_number = x.count('pts_time:')
-        return (
-            _frames_number /
-                frames_number(video) >=
-                    args.visual_filter_pace_rate
-            ) == (
-                args.visual_filter_pace == 'fast'
-            )
-    return visual_filter_base(
-        mapping,
-        video,
-        expr,
-        func
-    )
+        )
 
-def visual_filter_cuts_base(
-    mapping: Mapping, video
+def visual_filter_pace(
+    mapping: Mapping, video, images=None
 ):
-    expr = \
-        'select=\'gt(scene,{})\',showinfo' \
-            .format(
-                args.visual_filter_cuts_prob
-            )
-    def func(x):
-        return (
-            float(
-                s.split('pts_time:')[1]
-                    .split()[0]
-            ) for s in x.splitlines()
-                if 'pts_time:' in s
-        )
-    return visual_filter_base(
-        mapping,
-        video,
-        expr,
-        func
-    )
+    cuts, frames = \
+        indexes.cuts(
+            mapping.source.url,
+            video,
+            mapping.source.start,
+            mapping.source.final,
+            args.visual_filter_pace_prob
+        )
+    return (
+        len(cuts) / max(frames, 1) >=
+            args.visual_filter_pace_rate
+        ) == (
+            args.visual_filter_pace == 'fast'
+        )
 
-def visual_filter_cuts(mapping: Mapping, video):
-    cuts = \
-        next(iter(
-            visual_filter_base(
-                mapping, video
-            )), None
+def visual_filter_cuts(
+    mapping: Mapping, video, images=None
+):
+    cuts, _ = \
+        indexes.cuts(
+            mapping.source.url,
+            video,
+            mapping.source.start,
+            mapping.source.final,
+            args.visual_filter_cuts_prob
         )
-    return bool(cuts) == (
+    return bool(len(cuts)) == (
         args.visual_filter_cuts == 'include'
     )
 
-def visual_filter_dark(mapping: Mapping, video):
+def visual_filter_dark(
+    mapping: Mapping, video, images=None
+):
     dark = \
-        visual_filter_base(
-            mapping,
+        indexes.dark(
+            mapping.source.url,
             video,
-            'blackframe',
-            lambda x: 'pblack:' in x
+            mapping.source.start,
+            mapping.source.final
         )
-    return bool(dark) == (
+    return dark == (
         args.visual_filter_dark == 'include'
     )
 
-def frame(mapping: Mapping, video, color):
-    import cv2, tempfile
-    temp_file = \
-        tempfile.NamedTemporaryFile(
-            suffix='.png'
-        )
-    subprocess.run([
-        *args.ffmpeg,
-        '-loglevel', args.loglevel,
-        '-ss', str(
-            (mapping.source.start +
-                mapping.source.final) / 2
-        ),
-        '-i', video,
-        '-frames:v', str(1),
-        '-vcodec', 'png',
-        '-y', temp_file.name
-        ],
-        check=True
+def frame(mapping: Mapping, video, pix_fmt):
+    return frames(
+        video,
+        [(mapping.source.start +
+            mapping.source.final) / 2],
+        pix_fmt
+    )[0]
+
+def frames(video, points, pix_fmt):
+    import numpy
+    width, height = (
+        int(probes.property(
+            video, 'v:0', name, 'stream'
+        )) for name in ('width', 'height')
     )
-    image = \
-        cv2.cvtColor(
-            cv2.imread(
-                temp_file.name
-                ), color
+    shape = (height, width) \
+        if pix_fmt == 'gray' else \
+            (height, width, 3)
+    order = sorted(
+        range(len(points)),
+        key=points.__getitem__
+    )
+    images = [None] * len(points)
+    for batch in (
+        order[index:index +
+            args.visual_filter_batch]
+        for index in range(
+            0, len(order),
+            args.visual_filter_batch
+        )
+    ):
+        proc = processes.run([
+            *args.ffmpeg,
+            '-loglevel', args.loglevel,
+            *itertools.chain.from_iterable([
+                '-ss', '{:.3f}'.format(
+                    points[index]
+                ),
+                '-i', video
+            ] for index in batch),
+            '-filter_complex', ';'.join([
+                f'[{n}:v]trim=end_frame=1,'
+                    'setpts=PTS-STARTPTS,'
+                    f'scale={width}:{height}'
+                    f'[v{n}]'
+                for n in range(len(batch))
+            ] + [
+                ''.join(
+                    f'[v{n}]' for n in
+                        range(len(batch))
+                ) + 'concat=n={}:v=1:a=0[v]'
+                    .format(len(batch))
+            ]),
+            '-map', '[v]',
+            '-f', 'rawvideo',
+            '-pix_fmt', pix_fmt,
+            'pipe:1'
+            ],
+            check=True,
+            stdout=subprocess.PIPE
         )
-    temp_file.close()
-    return image
+        data = numpy.frombuffer(
+            proc.stdout if proc else b'',
+            dtype=numpy.uint8
+        )
+        if data.size != \
+            len(batch) * numpy.prod(shape):
+            raise Exception(
+                f'Can\'t read frames of "{video}".'
+            )
+        for index, image in zip(
+            batch,
+            data.reshape(len(batch), *shape)
+        ):
+            images[index] = image
+    return images
 
-def visual_filter_face(mapping: Mapping, video):
-    import cv2, dlib
+def visual_filter_face(
+    mapping: Mapping, video, images=None
+):
+    images = {} if images is None else images
     face = \
-        dlib.get_frontal_face_detector()(
+        indexes.verdict(
+            mapping.source.url,
+            video,
+            'faces',
+            indexes.grid(
+                mapping.source.start,
+                mapping.source.final
+            ),
+            lambda point:
+                frame_faces([
+                    frame_image(
+                        images, point, video
+                    )
+                ])[0]
+        )
+    return face == (
+        args.visual_filter_face == 'include'
+    )
+
+def frame_point(point):
+    return Mapping(
+        source=Resource(
+            start=point,
+            final=point
+        )
+    )
+
+def frame_image(images, point, video):
+    if point not in images:
+        images[point] = \
             frame(
-                mapping,
+                frame_point(point),
                 video,
-                cv2.COLOR_BGR2RGB
+                'rgb24'
             )
+    return images[point]
+
+def frame_faces(images):
+    images = [
+        face_image(image) for image in images
+    ]
+    if args.visual_filter_face_jobs < 2:
+        return [
+            frame_face(image) for image in images
+        ]
+    with lock:
+        if not pools:
+            pools.append(
+                multiprocessing.get_context(
+                    'forkserver'
+                ).Pool(
+                    args.visual_filter_face_jobs
+                )
+            )
+    return pools[0].starmap(
+        faces.detect, [
+            (
+                image,
+                args.visual_filter_face_upsample
+            ) for image in images
+        ]
+    )
+
+def face_image(image):
+    import cv2
+    scale = \
+        args.visual_filter_face_width / \
+            image.shape[1]
+    if scale >= 1:
+        return image
+    return cv2.resize(
+        image,
+        None,
+        fx=scale,
+        fy=scale,
+        interpolation=cv2.INTER_AREA
+    )
+
+def frame_face(image):
+    return faces.detect(
+        image,
+        args.visual_filter_face_upsample
+    )
+
+def visual_filter_word(
+    mapping: Mapping, video, images=None
+):
+    images = {} if images is None else images
+    word = \
+        indexes.verdict(
+            mapping.source.url,
+            video,
+            'words',
+            indexes.grid(
+                mapping.source.start,
+                mapping.source.final
+            ),
+            lambda point:
+                frame_word(
+                    frame_image(
+                        images, point, video
+                    )
+                )
         )
-    return bool(face) == (
-        args.visual_filter_face == 'include'
+    return word is not None and word == (
+        args.visual_filter_word == 'include'
     )
 
-def visual_filter_word(mapping: Mapping, video):
-    import cv2, pytesseract
+def frame_words(images):
+    if len(images) < 2 or \
+        args.visual_filter_word_jobs < 2:
+        return [
+            frame_word(image) for image in images
+        ]
+    with multiprocessing.pool.ThreadPool(
+        min(
+            len(images),
+            args.visual_filter_word_jobs
+        )
+    ) as pool:
+        return pool.map(frame_word, images)
+
+def frame_word(image):
+    import cv2, numpy, pytesseract
     image = \
-        frame(
-            mapping,
-            video,
-            cv2.COLOR_BGR2GRAY
+        cv2.cvtColor(
+            image, cv2.COLOR_RGB2GRAY
         )
+    edges = word_edges(image)
+    if edges.mean() < \
+        args.visual_filter_word_density:
+        return False
     _, threshold = \
         cv2.threshold(
             image,
@@ -193,15 +363,117 @@ def visual_filter_word(mapping: Mapping, video):
             cv2.RETR_EXTERNAL,
             cv2.CHAIN_APPROX_NONE
         )
-    text = None
-    for contour in contours:
-        x, y, w, h = cv2.boundingRect(contour)
+    regions = [
+        image[y:y+h, x:x+w]
+            for x, y, w, h in map(
+                cv2.boundingRect, contours
+            )
+        if w >= h >= 8 and
+            edges[y:y+h, x:x+w].mean() >=
+                args.visual_filter_word_density
+    ]
+    if not regions:
+        return False
+    page = \
+        numpy.full(
+            (
+                sum(r.shape[0] + 16 for r in regions),
+                max(r.shape[1] for r in regions)
+            ),
+            255,
+            dtype=numpy.uint8
+        )
+    y = 8
+    for region in regions:
+        page[
+            y:y + region.shape[0],
+            :region.shape[1]
+        ] = region
+        y += region.shape[0] + 16
+    try:
         text = \
             pytesseract.image_to_string(
-                image[y:y+h, x:x+w]
+                page,
+                timeout=
+                    args.visual_filter_word_timeout
             )
-        if text:
-            break
-    return bool(text) == (
-        args.visual_filter_word == 'include'
-    )
+    except RuntimeError:
+        return None
+    return bool(text.strip())
+
+def word_edges(image):
+    import numpy
+    image = image.astype(numpy.int16)
+    edges = numpy.zeros(image.shape, dtype=bool)
+    edges[:, 1:] = \
+        numpy.abs(numpy.diff(image, axis=1)) > 48
+    edges[1:, :] |= \
+        numpy.abs(numpy.diff(image, axis=0)) > 48
+    return edges
+
+def visual_filter_prefetch(mappings, analysis):
+    names = [
+        name for name, f in (
+            ('faces', visual_filter_face),
+            ('words', visual_filter_word)
+        ) if getattr(args, f.__name__)
+    ]
+    if not names:
+        return
+    filters = [
+        f for f in (
+            visual_filter_pace,
+            visual_filter_cuts,
+            visual_filter_dark
+        ) if getattr(args, f.__name__)
+    ]
+    sources = {}
+    for mapping in mappings:
+        video = analysis(mapping.source.url)
+        if not all(
+            f(mapping, video) for f in filters
+        ):
+            continue
+        point = indexes.grid(
+            mapping.source.start,
+            mapping.source.final
+        )
+        if all(
+            indexes.graded(
+                mapping.source.url,
+                video, name, point
+            ) for name in names
+        ):
+            continue
+        sources.setdefault(
+            (mapping.source.url, video), set()
+        ).add(point)
+    for (url, video), points in \
+        sources.items():
+        points = sorted(points)
+        images = dict(zip(
+            points,
+            frames(video, points, 'rgb24')
+        ))
+        for name, func in (
+            ('faces', frame_faces),
+            ('words', frame_words)
+        ):
+            if name not in names:
+                continue
+            pending = [
+                point for point in points
+                    if not indexes.graded(
+                        url, video, name, point
+                    )
+            ]
+            for point, value in zip(
+                pending,
+                func([
+                    images[point]
+                        for point in pending
+                ])
+            ):
+                indexes.record(
+                    url, video, name, point, value
+                )
@@ -0,0 +1,279 @@
+import multiprocessing.pool
+import os
+import pickle
+import subprocess
+import tempfile
+import threading
+import typing
+
+from . import args, caches, medias, probes
+
+class Index(typing.NamedTuple):
+    key: tuple
+    times: object
+    scores: object
+    blacks: object
+    faces: dict
+    words: dict
+
+indexes = {}
+locks = {}
+lock = threading.Lock()
+dirty = set()
+pools = []
+
+def index(url, video):
+    with url_lock(url):
+        if url not in indexes:
+            key = index_key(url)
+            _index = load(url)
+            if _index is None or \
+                _index.key != key:
+                _index = Index(
+                    key=key,
+                    times=None,
+                    scores=None,
+                    blacks=None,
+                    faces={},
+                    words={}
+                )
+            indexes[url] = _index
+    return indexes[url]
+
+def scanned(url, video):
+    index(url, video)
+    with url_lock(url):
+        if indexes[url].times is None:
+            indexes[url] = \
+                build(indexes[url], video)
+            dirty.add(url)
+    return indexes[url]
+
+def url_lock(url):
+    with lock:
+        return locks.setdefault(
+            url, threading.Lock()
+        )
+
+def index_key(url):
+    return (
+        probes.probe_key(url),
+        *((
+            args.visual_filter_proxy_height,
+            args.visual_filter_proxy_rate
+        ) if args.visual_filter_proxy else ())
+    )
+
+def index_file(url):
+    suffix = ''.join(
+        f'.{part}' for part in (
+            'proxy',
+            args.visual_filter_proxy_height,
+            args.visual_filter_proxy_rate
+        ) if part is not None
+    ) if args.visual_filter_proxy else ''
+    if os.path.isfile(url):
+        url = os.path.abspath(url)
+    return os.path.join(
+        os.path.dirname(
+            os.path.abspath(args.mappings)
+        ),
+        caches.data_hash(url.encode()) +
+            f'{suffix}.index'
+    )
+
+def load(url):
+    try:
+        with open(index_file(url), 'rb') as f:
+            return pickle.load(f)
+    except (
+        OSError,
+        EOFError,
+        pickle.UnpicklingError
+    ):
+        return None
+
+def save(url):
+    file = index_file(url)
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(file),
+        delete=False
+        ) as f:
+        _index = indexes[url]
+        pickle.dump(
+            _index._replace(
+                faces=dict(_index.faces),
+                words=dict(_index.words)
+            ),
+            f
+        )
+    os.replace(f.name, file)
+
+def flush():
+    with lock:
+        urls = list(dirty)
+        dirty.clear()
+    for url in urls:
+        save(url)
+
+def build(_index, video):
+    import numpy
+    chunks = [
+        pool().apply_async(
+            scan, (video, start, final)
+        ) for start, final in
+            scan_chunks(video)
+    ]
+    times, scores, blacks = [], [], []
+    for chunk in chunks:
+        _times, _scores, _blacks = chunk.get()
+        times.extend(_times)
+        scores.extend(_scores)
+        blacks.extend(_blacks)
+    return _index._replace(
+        times=numpy.asarray(times, dtype=float),
+        scores=numpy.asarray(scores, dtype=float),
+        blacks=numpy.asarray(blacks, dtype=float)
+    )
+
+def pool():
+    with lock:
+        if not pools:
+            pools.append(
+                multiprocessing.pool.ThreadPool(
+                    args.index_jobs
+                )
+            )
+    return pools[0]
+
+def scan_chunks(video):
+    try:
+        duration = float(
+            probes.property(
+                video, None,
+                'duration', 'format'
+            )
+        )
+    except Exception:
+        return [(0, None)]
+    points = [
+        point * args.index_chunk
+            for point in range(
+                int(duration / args.index_chunk)
+                    + 1
+            )
+    ]
+    return [
+        (start, final) for start, final in
+            zip(points, points[1:] + [None])
+    ]
+
+def scan(video, start=0, final=None):
+    seek = max(0, start - args.index_overlap)
+    proc = subprocess.run([
+        *args.ffmpeg,
+        '-loglevel', args.loglevel,
+        *(['-ss', '{:.3f}'.format(seek)]
+            if seek else []),
+        *(['-t', '{:.3f}'.format(
+            final - seek
+            )] if final is not None else []),
+        '-copyts',
+        '-i', video,
+        '-an',
+        '-vf',
+            'select=\'gte(scene,0)\','
+            'blackframe=amount=0,'
+            'metadata=print:file=-',
+        '-f', 'null',
+        '-'
+        ],
+        check=True,
+        stdout=subprocess.PIPE
+    )
+    times, scores, blacks = [], [], []
+    for line in \
+        proc.stdout.decode().splitlines():
+        if line.startswith('frame:'):
+            times.append(float(
+                line.split('pts_time:')[1]
+            ))
+            scores.append(0)
+            blacks.append(0)
+        elif line.startswith(
+            'lavfi.scene_score='
+        ):
+            scores[-1] = \
+                float(line.split('=')[1])
+        elif line.startswith(
+            'lavfi.blackframe.pblack='
+        ):
+            blacks[-1] = \
+                float(line.split('=')[1])
+    keep = [
+        index for index, time in
+            enumerate(times)
+        if (not start or time >= start) and
+            (final is None or time < final)
+    ]
+    return (
+        [times[index] for index in keep],
+        [scores[index] for index in keep],
+        [blacks[index] for index in keep]
+    )
+
+def frames(_index, start, final):
+    import numpy
+    return slice(*numpy.searchsorted(
+        _index.times, [start, final]
+    ))
+
+def cuts(url, video, start, final, prob):
+    _index = scanned(url, video)
+    _frames = frames(_index, start, final)
+    times = _index.times[_frames][1:]
+    return times[
+        _index.scores[_frames][1:] > prob
+    ], _index.times.size * \
+        medias.proxy_scale(url)
+
+def dark(url, video, start, final):
+    _index = scanned(url, video)
+    return bool(
+        (
+            _index.blacks[
+                frames(_index, start, final)
+            ] >= 98
+        ).any()
+    )
+
+def grid(start, final):
+    point = round(
+        (start + final) / 2 /
+            args.visual_filter_step
+    ) * args.visual_filter_step
+    return round(
+        min(max(point, start), final), 3
+    )
+
+def graded(url, video, name, point):
+    return point in \
+        getattr(index(url, video), name)
+
+def verdict(url, video, name, point, func):
+    _index = index(url, video)
+    verdicts = getattr(_index, name)
+    if point not in verdicts:
+        value = func(point)
+        if value is None:
+            return None
+        verdicts[point] = bool(value)
+        dirty.add(url)
+    return verdicts[point]
+
+def record(url, video, name, point, value):
+    if value is None:
+        return
+    verdicts = getattr(index(url, video), name)
+    verdicts[point] = bool(value)
+    dirty.add(url)
@@ -0,0 +1,76 @@
+import subprocess
+
+from . import args, caches, probes
+
+keyframes = {}
+
+def index(url, video):
+    if url not in keyframes:
+        keyframes[url] = \
+            caches.cached(
+                'keyframes',
+                probes.probe_key(url),
+                lambda: scan(video)
+            )
+    return keyframes[url]
+
+def scan(video):
+    import numpy
+    proc = subprocess.run([
+        *args.ffprobe,
+        '-v', 'quiet',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        video
+        ],
+        check=True,
+        stdout=subprocess.PIPE
+    )
+    return numpy.unique([
+        float(time) for time, flags in (
+            line.split(',')[:2] for line in
+                proc.stdout.decode().splitlines()
+            if line.count(',') >= 1
+        ) if 'K' in flags and time != 'N/A'
+    ])
+
+def snap(url, video, start, final, low, high):
+    import numpy
+    times = index(url, video)
+    duration = final - start
+    candidates = times[
+        (numpy.abs(times - start) <=
+            args.keyframes_window) &
+        (times >= low) &
+        (times + duration <= high)
+    ]
+    if not len(candidates):
+        return start, final
+    point = float(candidates[
+        numpy.abs(candidates - start).argmin()
+    ])
+    return point, point + duration
+
+def aligned(url, video, start):
+    import numpy
+    times = index(url, video)
+    return bool(
+        (numpy.abs(times - start) < 1e-3).any()
+    )
+
+def signature(video):
+    return tuple(
+        probes.property(
+            video, 'v:0', name, 'stream'
+        ) for name in (
+            'codec_name',
+            'profile',
+            'level',
+            'pix_fmt',
+            'width',
+            'height',
+            'r_frame_rate',
+            'time_base'
+        )
+    )
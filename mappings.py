@@ -2,6 +2,8 @@ import contextlib
 import datetime
 import os
 import re
+import tempfile
+import threading
 import typing
 import validators
 
@@ -16,6 +18,59 @@ class Mapping(typing.NamedTuple):
     source: Resource = None
     target: Resource = None
 
+umask = os.umask(0)
+os.umask(umask)
+
+class Journal:
+    def __init__(self, file, mappings, interval=5):
+        self.file = file
+        self.mappings = mappings
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.closed = threading.Event()
+        write(file, mappings)
+        self.journal = \
+            open(journal_file(file), 'w')
+        self.thread = \
+            threading.Thread(
+                target=self.run,
+                daemon=True
+            )
+        self.thread.start()
+
+    def append(self, idx, mapping):
+        with self.lock:
+            self.mappings[idx] = mapping
+            self.journal.write(
+                f'{idx}\t' + format_mapping(mapping)
+            )
+            self.journal.flush()
+            self.dirty = True
+
+    def run(self):
+        while not self.closed.wait(self.interval):
+            self.compact()
+
+    def compact(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            write(self.file, self.mappings)
+            self.journal.seek(0)
+            self.journal.truncate()
+            self.dirty = False
+
+    def close(self):
+        self.closed.set()
+        self.thread.join()
+        self.compact()
+        self.journal.close()
+        os.remove(journal_file(self.file))
+
+def journal_file(file):
+    return file + '.journal'
+
 def read(file):
     file = file or args.mappings
     if not os.path.exists(file):
@@ -28,13 +83,22 @@ def read(file):
                     f.read().splitlines()
                 )
             )
-        return mappings
+    if os.path.exists(journal_file(file)):
+        with open(journal_file(file), 'r') as f:
+            for line in f.read().split('\n')[:-1]:
+                idx, _, s = line.partition('\t')
+                with contextlib.suppress(
+                    ValueError, IndexError
+                ):
+                    mappings[int(idx)] = \
+                        parse_mapping(s)
+    return mappings
 
 def write(file, mappings):
-    with open(args.mappings, 'w') as f:
-        f.writelines(
-            map(format_mapping, mappings)
-        )
+    replace_file(
+        file,
+        map(format_mapping, mappings)
+    )
     if args.output_subtitles:
         write_subtitles(
             args.subtitles_output
@@ -44,6 +108,22 @@ def write(file, mappings):
             mappings
         )
 
+def replace_file(file, lines):
+    with tempfile.NamedTemporaryFile(
+        'w',
+        dir=os.path.dirname(
+            os.path.abspath(file)
+        ),
+        delete=False
+        ) as f:
+        f.writelines(lines)
+    try:
+        mode = os.stat(file).st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~umask
+    os.chmod(f.name, mode)
+    os.replace(f.name, file)
+
 def parse_mapping(s):
     t = s.split('\t')
     if t[2:]:
@@ -113,8 +193,9 @@ def read_subtitles(file):
         ]
 
 def write_subtitles(file, mappings):
-    with open(file, 'w') as f:
-        f.writelines(
+    replace_file(
+        file,
+        (
             '{}\n{} --> {}\n{}\n\n'
                 .format(
                     index + 1,
@@ -128,6 +209,7 @@ def write_subtitles(file, mappings):
                 ) for index, item in
                     enumerate(mappings)
         )
+    )
 
 def parse_timestamp(s):
     try:
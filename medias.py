@@ -0,0 +1,194 @@
+import collections
+import contextlib
+import fractions
+import multiprocessing.pool
+import os
+import subprocess
+import tempfile
+import threading
+import validators
+
+from . import args, caches, probes
+
+medias = {}
+proxies = {}
+sources = {}
+uses = collections.Counter()
+fetches = {}
+locks = {}
+lock = threading.Lock()
+pools = []
+
+def use(url, video, callback):
+    if args.no_cache or \
+        not args.media_cache_uses or \
+        not validators.url(video):
+        return
+    with lock:
+        uses[url] += 1
+        if url in medias or \
+            url in fetches or \
+            uses[url] < args.media_cache_uses:
+            return
+        file = media_file(url)
+        if os.path.isfile(file):
+            with contextlib.suppress(OSError):
+                os.utime(file)
+            medias[url] = file
+            callback(file)
+            return
+        if not pools:
+            pools.append(
+                multiprocessing.pool.ThreadPool(
+                    args.media_cache_jobs
+                )
+            )
+        fetches[url] = \
+            pools[0].apply_async(
+                fetch,
+                (url, video, file, callback)
+            )
+
+def media_file(url, *key):
+    return os.path.join(
+        args.media_cache_dir,
+        caches.data_hash(repr((
+            url,
+            args.videos_format,
+            args.videos_width,
+            args.videos_height,
+            *key
+            )).encode()
+        ) + '.mkv'
+    )
+
+def fetch(url, video, file, callback):
+    os.makedirs(
+        os.path.dirname(file), exist_ok=True
+    )
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(file),
+        suffix='.mkv',
+        delete=False
+        ) as f:
+        pass
+    try:
+        subprocess.run([
+            *args.ffmpeg,
+            '-loglevel', args.loglevel,
+            '-reconnect', '1',
+            '-reconnect_at_eof', '1',
+            '-reconnect_max_retries', '3',
+            '-reconnect_delay_max', '5',
+            '-i', video,
+            '-map', '0',
+            '-codec', 'copy',
+            '-y',
+            f.name
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError:
+        os.remove(f.name)
+        return None
+    os.replace(f.name, file)
+    with lock:
+        medias[url] = file
+        callback(file)
+    evict()
+    return file
+
+def proxy(url, video):
+    with lock:
+        url_lock = \
+            locks.setdefault(
+                url, threading.Lock()
+            )
+    with url_lock:
+        if url not in proxies:
+            sources[url] = video
+            proxies[url] = \
+                make_proxy(url, video)
+    return proxies[url]
+
+def proxy_scale(url):
+    if not args.visual_filter_proxy or \
+        not args.visual_filter_proxy_rate or \
+        proxies.get(url, sources.get(url)) == \
+            sources.get(url):
+        return 1
+    try:
+        return float(
+            fractions.Fraction(
+                probes.property(
+                    sources[url],
+                    'v:0',
+                    'r_frame_rate',
+                    'stream'
+                )
+            )
+        ) / args.visual_filter_proxy_rate
+    except (ValueError, ZeroDivisionError):
+        return 1
+
+def make_proxy(url, video):
+    file = media_file(
+        url,
+        probes.probe_key(url),
+        'proxy',
+        args.visual_filter_proxy_height,
+        args.visual_filter_proxy_rate
+    )
+    if os.path.isfile(file):
+        with contextlib.suppress(OSError):
+            os.utime(file)
+        return file
+    os.makedirs(
+        os.path.dirname(file), exist_ok=True
+    )
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(file),
+        suffix='.mkv',
+        delete=False
+        ) as f:
+        pass
+    try:
+        subprocess.run([
+            *args.ffmpeg,
+            '-loglevel', args.loglevel,
+            '-i', video,
+            '-map', '0:v:0',
+            '-vf', ','.join([
+                'scale=-2:{}'.format(
+                    args.visual_filter_proxy_height
+                ),
+                *([
+                    'fps={}'.format(
+                        args.visual_filter_proxy_rate
+                    )
+                ] if args.visual_filter_proxy_rate
+                    else [])
+            ]),
+            '-codec:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', '28',
+            '-g', '24',
+            '-y',
+            f.name
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError:
+        os.remove(f.name)
+        return video
+    os.replace(f.name, file)
+    evict()
+    return file
+
+def evict():
+    caches.evict(
+        args.media_cache_dir,
+        args.media_cache_size,
+        set(medias.values()) |
+            set(proxies.values())
+    )
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import threading
+import time
+import validators
+
+from . import args, caches
+
+probes = {}
+lock = threading.Lock()
+
+def probe(url):
+    key = probe_key(url)
+    with lock:
+        if key in probes:
+            return probes[key]
+    entry = caches.load('probes', key)
+    if entry is None or (
+        validators.url(url) and
+            time.time() - entry[0] > args.probe_ttl
+    ):
+        entry = (time.time(), run_probe(url))
+        if entry[1] is None:
+            return None
+        caches.store('probes', key, entry)
+    with lock:
+        probes[key] = entry[1]
+    return entry[1]
+
+def probe_key(url):
+    if validators.url(url) or \
+        not os.path.exists(url):
+        return ('url', url)
+    stat = os.stat(url)
+    return (
+        'file',
+        os.path.abspath(url),
+        stat.st_size,
+        stat.st_mtime_ns
+    )
+
+def run_probe(url):
+    proc = subprocess.run([
+        *args.ffprobe,
+        '-v', 'quiet',
+        '-of', 'json',
+        '-show_format',
+        '-show_streams',
+        url
+        ],
+        check=False,
+        stdout=subprocess.PIPE
+    )
+    if proc.returncode != 0:
+        return None
+    return json.loads(proc.stdout.decode())
+
+def entries(url, stream, section):
+    data = probe(url)
+    if data is None:
+        raise Exception(
+            f'Can\'t probe "{url}".'
+        )
+    if section == 'format':
+        return data.get('format', {})
+    kind, index = stream.split(':')
+    streams = [
+        s for s in data.get('streams', [])
+            if s.get('codec_type') == {
+                'v': 'video',
+                'a': 'audio',
+                's': 'subtitle'
+            }[kind]
+    ]
+    return streams[int(index)] \
+        if int(index) < len(streams) else {}
+
+def property(url, stream, name, section):
+    return str(
+        entries(url, stream, section)
+            .get(name, '')
+    )
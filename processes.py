@@ -0,0 +1,40 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+local = threading.local()
+
+def init(namespace):
+    sys.modules[__package__].args = namespace
+
+def run(cmd, cancel=None, check=False, **kwargs):
+    cancel = cancel or \
+        getattr(local, 'cancel', None)
+    if cancel is None:
+        return subprocess.run(
+            cmd, check=check, **kwargs
+        )
+    if cancel.is_set():
+        return None
+    with subprocess.Popen(
+        cmd, start_new_session=True, **kwargs
+        ) as proc:
+        while True:
+            try:
+                stdout, stderr = \
+                    proc.communicate(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    proc.communicate()
+                    return None
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, stdout, stderr
+        )
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout, stderr
+    )
@@ -0,0 +1,124 @@
+import heapq
+import multiprocessing.pool
+import re
+import threading
+import time
+import typing
+
+from . import args, caches
+from .youtube import youtube_video
+
+class Resolve(typing.NamedTuple):
+    time: float
+    url: str
+    duration: float
+    expires: float
+
+callbacks = {}
+queue = []
+condition = threading.Condition()
+threads = []
+pools = []
+
+def resolve(url, strict=True, callback=None):
+    key = resolve_key(url)
+    entry = caches.load('resolves', key)
+    if entry is None or expired(entry):
+        entry = run_resolve(url, strict)
+        if entry is None:
+            return None
+        caches.store('resolves', key, entry)
+    if callback:
+        callbacks[url] = callback
+    schedule(url, entry)
+    return entry.url, entry.duration
+
+def resolve_key(url):
+    return (
+        url,
+        args.videos_format,
+        args.videos_width,
+        args.videos_height
+    )
+
+def run_resolve(url, strict):
+    video = youtube_video(url, strict=strict)
+    if not video:
+        return None
+    return Resolve(
+        time=time.time(),
+        url=video[0],
+        duration=video[1],
+        expires=expires(video[0])
+    )
+
+def expires(url):
+    match = re.search(
+        r'[?&/]expire[=/](\d+)', url
+    )
+    return float(match.group(1)) \
+        if match else None
+
+def deadline(entry):
+    if entry.expires is None:
+        return entry.time + args.probe_ttl
+    return entry.expires - args.videos_refresh
+
+def expired(entry):
+    return deadline(entry) <= time.time()
+
+def schedule(url, entry):
+    if entry.expires is None:
+        return
+    with condition:
+        heapq.heappush(
+            queue, (deadline(entry), url)
+        )
+        if not threads:
+            pools.append(
+                multiprocessing.pool.ThreadPool(
+                    args.videos_jobs
+                )
+            )
+            threads.append(
+                threading.Thread(
+                    target=run, daemon=True
+                )
+            )
+            threads[0].start()
+        condition.notify()
+
+def run():
+    while True:
+        with condition:
+            while not queue or \
+                queue[0][0] > time.time():
+                condition.wait(
+                    queue[0][0] - time.time()
+                        if queue else None
+                )
+            _, url = heapq.heappop(queue)
+        pools[0].apply_async(refresh, (url,))
+
+def refresh(url):
+    try:
+        entry = run_resolve(url, False)
+    except Exception:
+        entry = None
+    if entry is None:
+        with condition:
+            heapq.heappush(queue, (
+                time.time() +
+                    args.videos_refresh / 4,
+                url
+            ))
+            condition.notify()
+        return
+    caches.store(
+        'resolves', resolve_key(url), entry
+    )
+    if url in callbacks:
+        callbacks[url](
+            entry.url, entry.duration
+        )
+    schedule(url, entry)
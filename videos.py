@@ -1,34 +1,72 @@
+import bisect
+import collections
+import itertools
+import math
 import multiprocessing.pool
 import os
+import queue
 import random
 import re
 import subprocess
 import sys
+import threading
 import typing
 import validators
 
-from . import args
+from . import (
+    args,
+    caches,
+    cuts,
+    indexes,
+    keyframes,
+    medias,
+    probes,
+    processes
+)
 from .filters import (
     visual_filter,
-    visual_filter_cuts_base
+    visual_filter_prefetch,
+    visual_filter_report,
+    visual_filters
 )
 from .mappings import (
+    Journal,
     Mapping,
-    Resource,
-    write
+    Resource
 )
+from .resolvers import resolve
 from .youtube import (
     youtube_libraries,
-    youtube_playlists,
-    youtube_video
+    youtube_playlists
 )
 
 class Video(typing.NamedTuple):
     url: str
     duration: float
 
+class Spans(typing.NamedTuple):
+    starts: list
+    finals: list
+    bases: list
+    ends: list
+
+class Timeline(typing.NamedTuple):
+    inputs: list
+    durations: list
+    offsets: list
+    ranges: list
+
 videos = {}
 mappings = []
+drafts = {}
+deferred = {}
+modes = {}
+signatures = {}
+speculations = []
+speculations_lock = threading.Lock()
+journals = {}
+timelines = {}
+timelines_lock = threading.Lock()
 
 def read():
     youtube_libraries(args.videos, 'video')
@@ -61,7 +99,10 @@ def read():
         )
     pool = \
         multiprocessing.pool.ThreadPool(
-            len(args.videos)
+            min(
+                len(args.videos),
+                args.videos_jobs
+            )
         )
     result = [
         pool.apply_async(
@@ -71,6 +112,7 @@ def read():
     pool.close()
     pool.join()
     [r.get() for r in result]
+    timeline()
     return args.videos
 
 def read_video(url, strict=True):
@@ -79,8 +121,11 @@ def read_video(url, strict=True):
             'youtu.be' in url
     ):
         video = \
-            youtube_video(
-                url, strict=strict
+            resolve(
+                url,
+                strict=strict,
+                callback=lambda *video:
+                    refresh_video(url, *video)
             )
         if not video:
             assert not strict
@@ -98,31 +143,50 @@ def read_video(url, strict=True):
             )
     return videos[url]
 
+def refresh_video(url, stream, duration):
+    videos[url] = \
+        Video(
+            url=medias.medias.get(url, stream),
+            duration=duration
+        )
+
+def use_video(url):
+    if url not in videos:
+        read_video(url)
+    medias.use(
+        url,
+        videos[url].url,
+        lambda file:
+            videos.__setitem__(
+                url,
+                videos[url]._replace(url=file)
+            )
+    )
+
+def analysis_video(url):
+    if not args.visual_filter_proxy:
+        return videos[url].url
+    return medias.proxy(url, videos[url].url)
+
 def mappings_from_cuts(url):
     video = read_video(url)
-    points = [0]
-    points.extend(
-        visual_filter_cuts_base(
-            Mapping(
-                source=Resource(
-                    start=0,
-                    final=video.duration
-                )
-            ), video.url
+    points, _ = \
+        indexes.cuts(
+            url,
+            analysis_video(url),
+            0,
+            video.duration,
+            args.visual_filter_cuts_prob
         )
-    )
+    points = [0, *points.tolist()]
     points.append(video.duration)
-    p = [points[0]]
-    points[1:-1] = [
-        points[i]
-        for i in range(1, len(points) - 1)
-            if points[i] - p[0] >=
+    if args.mappings_min_interval:
+        points = \
+            cuts.squeeze(
+                cuts.unique(points),
                 args.mappings_min_interval
-                and points[-1] - points[i] >=
-                    args.mappings_min_interval
-                and not p.remove(p[0])
-                and not p.append(points[i])
-    ]
+            ).tolist()
+    indexes.flush()
     return [
         Mapping(
             source=Resource(
@@ -139,72 +203,254 @@ def mappings_from_cuts(url):
 
 def generate_mappings(_mappings):
     mappings[:] = _mappings
+    drafts.clear()
+    modes.clear()
+    pending = [
+        idx for idx, mapping
+            in enumerate(mappings)
+        if mapping.source is None or
+            mapping.source.url is None or
+                mapping.source.start == -1
+    ]
+    if pending:
+        drafts.update(
+            zip(pending, next_inputs(pending))
+        )
+        visual_filter_prefetch([
+            Mapping(
+                source=Resource(
+                    url=input,
+                    start=start,
+                    final=final
+                )
+            ) for input, start, final
+                in drafts.values()
+        ], analysis_video)
+    deferred.clear()
+    journals[args.mappings] = \
+        Journal(
+            args.mappings,
+            mappings,
+            args.mappings_flush
+        )
+    try:
+        pool = \
+            multiprocessing.pool.ThreadPool(
+                args.visual_filter_threads
+            )
+        result = [
+            pool.apply_async(
+                generate_mapping, (idx, True)
+            ) for idx in range(len(mappings))
+        ]
+        pool.close()
+        pool.join()
+        result = [r.get() for r in result]
+        cache_inputs(deferred)
+        if args.increment:
+            _modes = [
+                cache_mode(idx)
+                    for idx in range(len(result))
+            ]
+            recache = [
+                idx for idx, mode in
+                    enumerate(_modes)
+                if mode is not False
+            ] if not all(_modes) else []
+            if recache:
+                pool = \
+                    multiprocessing.pool.ThreadPool(
+                        args.increment_jobs
+                    )
+                pool.starmap(
+                    cache_input,
+                    [
+                        (result[idx], idx, False)
+                            for idx in recache
+                    ]
+                )
+                pool.close()
+                pool.join()
+        return result
+    finally:
+        journals.pop(args.mappings).close()
+        indexes.flush()
+        visual_filter_report()
+
+def generate_mappings_live(_mappings):
+    mappings.clear()
+    journals[args.mappings] = \
+        Journal(
+            args.mappings,
+            mappings,
+            args.mappings_flush
+        )
     pool = \
         multiprocessing.pool.ThreadPool(
             args.visual_filter_threads
         )
-    result = [
-        pool.apply_async(
-            generate_mapping, (idx,)
-        ) for idx in range(len(mappings))
-    ]
+    window = \
+        args.visual_filter_threads or \
+            os.cpu_count()
+    result = collections.deque()
+    for mapping in _mappings:
+        mappings.append(mapping)
+        result.append(
+            pool.apply_async(
+                generate_mapping,
+                (len(mappings) - 1,)
+            )
+        )
+        while result and (
+            result[0].ready() or
+                len(result) >= window
+        ):
+            yield result.popleft().get()
     pool.close()
+    while result:
+        yield result.popleft().get()
     pool.join()
-    return [r.get() for r in result]
+    journals.pop(args.mappings).close()
+    indexes.flush()
+    visual_filter_report()
 
-def generate_mapping(idx):
+def generate_mapping(idx, defer=False):
     random.seed(
         idx + random.randint(
             0, sys.maxsize
         )
     )
     retries = args.visual_filter_retries
+    tries, rejects = 0, 0
     while True:
         mapping, mapping_updated = \
             update_mapping(idx)
-        if args.increment:
-            cache_file_name = \
-                args.video_cache \
-                    .format(idx + 1)
-            if mapping_updated or \
-                not os.path.isfile(
-                    cache_file_name
-                ):
-                cache_input(mapping, idx)
-        if not mapping_updated:
-            break
-        if not args.increment:
-            _mapping = mapping
-            file_name = \
-                videos[mapping.source.url].url
+        count = \
+            speculate_count(
+                idx, tries, rejects, retries
+            ) if mapping_updated else 1
+        candidates = [mapping] + [
+            update_mapping(idx)[0]
+                for _ in range(count - 1)
+        ]
+        if mapping_updated:
+            for candidate in candidates:
+                use_video(candidate.source.url)
+        if count > 1:
+            accepted, rejected = \
+                speculate(candidates)
         else:
-            duration = \
-                mapping.target.final - \
-                    mapping.target.start
-            _mapping = \
-                Mapping(
-                    source=Resource(
-                        url=cache_file_name,
-                        start=0,
-                        final=duration
-                    ),
-                    target=Resource(
-                        start=
-                        mapping.target.start,
-                        final=
-                        mapping.target.final
+            accepted, rejected = (
+                mapping, 0
+            ) if not mapping_updated or \
+                not visual_filters() or \
+                visual_filter(
+                    mapping,
+                    analysis_video(
+                        mapping.source.url
                     )
+                ) else (None, 1)
+        tries += count
+        rejects += rejected
+        if accepted is None and \
+            retries < count:
+            accepted = candidates[-1]
+        if accepted is not None:
+            mapping = accepted
+            if args.increment and (
+                mapping_updated or
+                not os.path.isfile(
+                    args.video_cache
+                        .format(idx + 1)
+                )
+            ):
+                if defer:
+                    deferred[idx] = mapping
+                else:
+                    cache_input(mapping, idx)
+            if mapping_updated:
+                journals[args.mappings].append(
+                    idx, mapping
                 )
-            file_name = cache_file_name
-        accept = \
-            visual_filter(_mapping, file_name)
-        if accept or retries == 0:
-            mappings[idx] = mapping
-            write(args.mappings, mappings)
             break
-        retries -= 1
+        retries -= count
     return mapping
 
+def speculate_count(idx, tries, rejects, retries):
+    mapping = mappings[idx]
+    if not args.visual_filter_speculate or \
+        not tries or not (
+            mapping.source is None or
+            mapping.source.url is None or
+            mapping.source.start == -1
+        ):
+        return 1
+    rate = (rejects + 1) / (tries + 2)
+    return max(1, min(
+        args.visual_filter_speculate,
+        retries + 1,
+        math.ceil(
+            math.log(0.1) / math.log(rate)
+        )
+    ))
+
+def speculate(candidates):
+    with speculations_lock:
+        if not speculations:
+            speculations.append(
+                multiprocessing.pool.ThreadPool(
+                    (args.visual_filter_threads or
+                        os.cpu_count()) *
+                    args.visual_filter_speculate
+                )
+            )
+    cancel = threading.Event()
+    results = queue.Queue()
+    for candidate in candidates:
+        speculations[0].apply_async(
+            speculate_candidate,
+            (candidate, cancel),
+            callback=results.put,
+            error_callback=results.put
+        )
+    accepted, error, rejected = None, None, 0
+    for _ in candidates:
+        result = results.get()
+        if accepted is not None or \
+            error is not None:
+            continue
+        if isinstance(result, Exception):
+            cancel.set()
+            error = result
+            continue
+        candidate, accept = result
+        if accept:
+            cancel.set()
+            accepted = candidate
+        else:
+            rejected += 1
+    if error is not None:
+        raise error
+    return accepted, rejected
+
+def speculate_candidate(candidate, cancel):
+    processes.local.cancel = cancel
+    try:
+        return candidate, \
+            not visual_filters() or \
+            visual_filter(
+                candidate,
+                analysis_video(
+                    candidate.source.url
+                )
+            )
+    except Exception:
+        if cancel.is_set():
+            return candidate, False
+        raise
+    finally:
+        processes.local.cancel = None
+
 def update_mapping(idx):
     mapping = mappings[idx]
     if (mapping.source is None or
@@ -212,6 +458,19 @@ def update_mapping(idx):
         mapping.source.start == -1):
         input, input_start, input_final = \
             next_input(idx)
+        if args.keyframes:
+            input_start, input_final = \
+                keyframes.snap(
+                    input,
+                    videos[input].url,
+                    input_start,
+                    input_final,
+                    *input_span(
+                        input,
+                        input_start,
+                        input_final
+                    )
+                )
     else:
         output_duration = \
             mapping.target.final \
@@ -237,20 +496,27 @@ def update_mapping(idx):
         target=mapping.target
         ), mapping_updated
 
+def input_span(input, start, final):
+    line = timeline()
+    spans = \
+        line.ranges[line.inputs.index(input)] \
+            if input in line.inputs else None
+    if not spans:
+        return 0, videos[input].duration
+    for span_start, span_final in zip(
+        spans.starts, spans.finals
+    ):
+        if span_start - 1e-6 <= start and \
+            final <= span_final + 1e-6:
+            return span_start, span_final
+    return start, final
+
 def next_input(idx):
+    if idx in drafts:
+        return drafts.pop(idx)
     mapping = mappings[idx]
-    inputs = [
-        input
-        for input in sorted(
-            videos.keys(),
-            key=lambda v: (
-                list(
-                    args.inputs.keys()
-                    ) + [v[0]]
-                ).index(v[0])
-        )
-    ]
-    if not inputs:
+    line = timeline()
+    if not line.inputs:
         raise Exception(
             'Video not found for {}-{}.'
                 .format(
@@ -258,43 +524,37 @@ def next_input(idx):
                     mapping.target.final
                 )
         )
-    def complete_duration(input):
-        if input in args.inputs:
-            return sum(
-                ((
-                    final if final != -1
-                        else duration(input)
-                ) - (
-                    start if start != -1 else 0
-                )) for start, final in
-                    args.inputs[input]
-            )
-        else:
-            return duration(input)
-    inputs_duration = \
-        sum(map(complete_duration, inputs))
+    inputs_duration = line.offsets[-1]
     output_duration = \
         mapping.target.final \
             - mapping.target.start
     assert inputs_duration >= output_duration
+    position, share = (
+        mapping.target.start,
+        output_duration
+        ) if args.stream_live else (
+        idx / len(mappings) * inputs_duration,
+        inputs_duration / len(mappings)
+    )
     point = (
-        idx / len(mappings)
+        position
             * args.visual_filter_chrono_speed
-            * inputs_duration % inputs_duration
+            % inputs_duration
         ) if args.visual_filter_chrono else \
             random.uniform(0, inputs_duration)
-    for input in inputs:
-        input_duration = \
-            complete_duration(input)
-        if point <= input_duration:
-            break
-        point -= input_duration
+    index = min(
+        bisect.bisect_left(
+            line.offsets, point, 1
+        ) - 1,
+        len(line.inputs) - 1
+    )
+    point -= line.offsets[index]
+    input_duration = line.durations[index]
     delta = \
         0.5 * max(
             min(1,
-                inputs_duration /
-                    input_duration /
-                        len(mappings) *
+                share /
+                    input_duration *
                 args.visual_filter_chrono_scope
                 ) * input_duration
             if args.visual_filter_chrono
@@ -311,32 +571,192 @@ def next_input(idx):
                     ) - output_duration
             )
         )
-    if input in args.inputs:
-        for start, final in args.inputs[input]:
-            if start == -1:
-                start = 0
-            if final == -1:
-                final = duration(input)
-            if point < final - start:
-                point = min(
-                    start + point,
-                    final - output_duration
-                )
-                break
-            point -= final - start
+    spans = line.ranges[index]
+    if spans:
+        span = \
+            bisect.bisect_right(spans.ends, point)
+        if span < len(spans.starts):
+            point = min(
+                spans.starts[span] + point -
+                    spans.bases[span],
+                spans.finals[span] -
+                    output_duration
+            )
     return (
-        input,
+        line.inputs[index],
         point,
         point + output_duration
     )
 
-def cache_input(mapping: Mapping, idx):
+def next_inputs(indices):
+    import numpy
+    line = timeline()
+    if not line.inputs:
+        raise Exception('Video not found.')
+    rng = \
+        numpy.random.default_rng(
+            random.getrandbits(64)
+        )
+    indices = numpy.asarray(indices)
+    output_duration = \
+        numpy.array([
+            mappings[idx].target.final -
+                mappings[idx].target.start
+            for idx in indices
+        ])
+    offsets = numpy.asarray(line.offsets)
+    durations = numpy.asarray(line.durations)
+    inputs_duration = offsets[-1]
+    assert inputs_duration >= \
+        output_duration.max(initial=0)
+    points = (
+        indices / len(mappings)
+            * args.visual_filter_chrono_speed
+            * inputs_duration % inputs_duration
+        ) if args.visual_filter_chrono else \
+            rng.uniform(
+                0, inputs_duration, len(indices)
+            )
+    index = \
+        numpy.minimum(
+            numpy.searchsorted(
+                offsets[1:], points
+            ),
+            len(line.inputs) - 1
+        )
+    points = points - offsets[index]
+    input_duration = durations[index]
+    delta = \
+        0.5 * numpy.maximum(
+            numpy.minimum(1,
+                inputs_duration /
+                    input_duration /
+                        len(mappings) *
+                args.visual_filter_chrono_scope
+                ) * input_duration
+            if args.visual_filter_chrono
+                else input_duration,
+            output_duration
+        )
+    low = numpy.maximum(0, points - delta)
+    high = \
+        numpy.maximum(0,
+            numpy.minimum(
+                points + delta,
+                input_duration
+                ) - output_duration
+        )
+    points = \
+        low + (high - low) * \
+            rng.random(len(indices))
+    for i, spans in enumerate(line.ranges):
+        mask = index == i
+        if not spans or not mask.any():
+            continue
+        span = \
+            numpy.searchsorted(
+                spans.ends, points[mask], 'right'
+            )
+        valid = span < len(spans.starts)
+        span = numpy.minimum(
+            span, len(spans.starts) - 1
+        )
+        points[mask] = \
+            numpy.where(
+                valid,
+                numpy.minimum(
+                    numpy.asarray(spans.starts)[span]
+                        + points[mask] -
+                    numpy.asarray(spans.bases)[span],
+                    numpy.asarray(spans.finals)[span]
+                        - output_duration[mask]
+                ),
+                points[mask]
+            )
+    return [
+        (
+            line.inputs[i],
+            float(point),
+            float(point + duration)
+        ) for i, point, duration in zip(
+            index, points, output_duration
+        )
+    ]
+
+def timeline():
+    key = tuple(videos.keys())
+    with timelines_lock:
+        if key not in timelines:
+            timelines.clear()
+            timelines[key] = build_timeline()
+        return timelines[key]
+
+def build_timeline():
+    inputs = [
+        input
+        for input in sorted(
+            videos.keys(),
+            key=lambda v: (
+                list(
+                    args.inputs.keys()
+                    ) + [v[0]]
+                ).index(v[0])
+        )
+    ]
+    durations, ranges = [], []
+    for input in inputs:
+        if input not in args.inputs:
+            ranges.append(None)
+            durations.append(duration(input))
+            continue
+        starts, finals = [], []
+        for start, final in args.inputs[input]:
+            starts.append(
+                start if start != -1 else 0
+            )
+            finals.append(
+                final if final != -1
+                    else duration(input)
+            )
+        ends = list(
+            itertools.accumulate(
+                final - start for start, final
+                    in zip(starts, finals)
+            )
+        )
+        ranges.append(
+            Spans(
+                starts=starts,
+                finals=finals,
+                bases=[0] + ends[:-1],
+                ends=ends
+            )
+        )
+        durations.append(
+            ends[-1] if ends else 0
+        )
+    return Timeline(
+        inputs=inputs,
+        durations=durations,
+        offsets=list(
+            itertools.accumulate(
+                durations, initial=0
+            )
+        ),
+        ranges=ranges
+    )
+
+def cache_input(mapping: Mapping, idx, copy=None):
     if mapping.source.url not in videos:
         read_video(mapping.source.url)
+    if copy is None:
+        copy = cache_copy(mapping)
     subprocess.run([
         *args.ffmpeg,
         '-loglevel', args.loglevel,
         '-ss',
+            repr(mapping.source.start)
+                if copy else
             '{:.3f}'.format(
                 mapping.source.start
             ),
@@ -348,6 +768,179 @@ def cache_input(mapping: Mapping, idx):
             ),
         '-i',
             videos[mapping.source.url].url,
+        *(
+            ['-codec:v', 'copy']
+            if copy else cache_codec()
+        ),
+        '-an',
+        '-y',
+        args.video_cache.format(idx + 1)
+        ],
+        check=True
+    )
+    cache_record(idx, copy)
+
+def cache_record(idx, copy):
+    modes[idx] = copy
+    caches.store(
+        'modes',
+        probes.probe_key(
+            args.video_cache.format(idx + 1)
+        ),
+        copy
+    )
+
+def cache_mode(idx):
+    file = args.video_cache.format(idx + 1)
+    if idx not in modes and \
+        os.path.isfile(file):
+        modes[idx] = \
+            caches.load(
+                'modes',
+                probes.probe_key(file)
+            )
+    return modes.get(idx)
+
+def cache_inputs(segments):
+    sources = {}
+    for idx, mapping in segments.items():
+        sources.setdefault(
+            mapping.source.url, []
+        ).append((idx, mapping))
+    runs = [
+        run for segments in sources.values()
+            for run in cache_runs([
+                segment for segment in segments
+                    if not cache_copy(segment[1])
+            ])
+    ] + [
+        [segment] for segments in sources.values()
+            for segment in segments
+                if cache_copy(segment[1])
+    ]
+    if not runs:
+        return
+    pool = \
+        multiprocessing.pool.ThreadPool(
+            args.increment_jobs
+        )
+    pool.map(cache_run, runs)
+    pool.close()
+    pool.join()
+
+def cache_runs(segments):
+    runs, final = [], None
+    for idx, mapping in sorted(
+        segments,
+        key=lambda segment:
+            segment[1].source.start
+    ):
+        if final is None or \
+            len(runs[-1]) >= \
+                args.increment_batch or \
+            mapping.source.start - final > \
+                args.increment_gap:
+            runs.append([])
+            final = mapping.source.final
+        runs[-1].append((idx, mapping))
+        final = max(
+            final, mapping.source.final
+        )
+    return runs
+
+def cache_run(run):
+    url = run[0][1].source.url
+    if url not in videos:
+        read_video(url)
+    if len(run) == 1:
+        return cache_input(run[0][1], run[0][0])
+    start = run[0][1].source.start
+    trims = [
+        (
+            mapping.source.start - start,
+            mapping.source.final - start +
+                args.increment_offset
+        ) for _, mapping in run
+    ]
+    try:
+        subprocess.run([
+            *args.ffmpeg,
+            '-loglevel', args.loglevel,
+            '-ss', '{:.3f}'.format(start),
+            '-t', '{:.3f}'.format(
+                max(final for _, final in trims)
+            ),
+            '-i', videos[url].url,
+            '-filter_complex', ';'.join([
+                '[0:v]split={}{}'.format(
+                    len(run),
+                    ''.join(
+                        f'[s{index}]' for index
+                            in range(len(run))
+                    )
+                )
+            ] + [
+                f'[s{index}]trim='
+                    f'start={trim_start:.3f}:'
+                    f'end={trim_final:.3f},'
+                    'setpts=PTS-STARTPTS'
+                    f'[o{index}]'
+                for index, (
+                    trim_start, trim_final
+                ) in enumerate(trims)
+            ]),
+            *itertools.chain.from_iterable([
+                '-map', f'[o{index}]',
+                *cache_codec(),
+                '-an',
+                '-y',
+                args.video_cache.format(idx + 1)
+            ] for index, (idx, _) in
+                enumerate(run)
+            )
+            ],
+            check=True
+        )
+        for idx, _ in run:
+            cache_record(idx, False)
+    except subprocess.CalledProcessError:
+        for idx, mapping in run:
+            cache_input(mapping, idx)
+
+def cache_copy(mapping):
+    if not args.keyframes or \
+        args.stream_live:
+        return False
+    if mapping.source.url not in videos:
+        read_video(mapping.source.url)
+    return copy_signature() is not None \
+        and keyframes.aligned(
+            mapping.source.url,
+            videos[mapping.source.url].url,
+            mapping.source.start
+        )
+
+def copy_signature():
+    line = timeline()
+    key = tuple(line.inputs)
+    with timelines_lock:
+        if key not in signatures:
+            signatures.clear()
+            found = {
+                keyframes.signature(
+                    videos[input].url
+                ) for input in line.inputs
+            }
+            signatures[key] = \
+                found.pop() if len(found) == 1 \
+                    else None
+            if signatures[key] and \
+                signatures[key][0] != 'h264':
+                signatures[key] = None
+        return signatures[key]
+
+def cache_codec():
+    return [
         '-codec:v', 'libx264',
         *(
             ['-crf', '17']
@@ -362,28 +955,13 @@ def cache_input(mapping: Mapping, idx):
             else ['-preset', 'veryfast']
             if args.output_quality == 'low'
             else []
-        ),
-        '-an',
-        '-y',
-        args.video_cache.format(idx + 1)
-        ],
-        check=True
-    )
+        )
+    ]
 
 def property(url, stream, name):
-    proc = subprocess.run([
-        *args.ffprobe,
-        '-select_streams', stream,
-        '-show_entries', f'stream={name}',
-        '-of', 'default='
-            'noprint_wrappers=1:nokey=1',
-        '-v', 'quiet',
-        url
-        ],
-        check=True,
-        stdout=subprocess.PIPE
+    return probes.property(
+        url, stream, name, 'stream'
     )
-    return proc.stdout.decode()
 
 def duration(url):
     if validators.url(url):
@@ -5,7 +5,7 @@ import subprocess
 import urllib.parse
 import validators
 
-from . import args
+from . import args, probes, processes
 from .mappings import (
     parse_timestamp,
     read_subtitles
@@ -161,7 +161,7 @@ def youtube_video(
     strict=True
 ):
     try:
-       proc = subprocess.run([
+       proc = processes.run([
             *args.yt_dlp,
             '--quiet',
             '--no-warnings',
@@ -187,6 +187,8 @@ def youtube_video(
             ):
                 return None
         raise e
+    if proc is None:
+        return None
     output = \
         proc.stdout.decode().splitlines()
     variants = [
@@ -202,14 +204,7 @@ def youtube_video(
     return variants[0] if variants else None
 
 def youtube_check_video(url):
-    proc = subprocess.run([
-        *args.ffprobe,
-        '-v', 'quiet',
-        url
-        ],
-        check=False
-    )
-    return proc.returncode == 0
+    return probes.probe(url) is not None
 
 def youtube_video_url(id):
     return f'https://youtu.be/{id}'